@@ -13,6 +13,9 @@ from src.models.tags import TagModel
 from src.models.tags_dogs import tag_dog
 from src.models.tags_news import tag_news
 from src.models.requests import RequestModel, AdoptionRequestModel, GuardianRequestModel
+from src.models.images import ImageRefModel
+from src.models.versions import ResourceVersionModel
+from src.models.counters import CounterModel
 
 config = context.config
 
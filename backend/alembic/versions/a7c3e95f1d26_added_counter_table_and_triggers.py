@@ -0,0 +1,114 @@
+"""added counter table and triggers
+
+Revision ID: a7c3e95f1d26
+Revises: f2b8d61c4a07
+Create Date: 2026-10-18 23:41:09.615230
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7c3e95f1d26'
+down_revision: Union[str, None] = 'f2b8d61c4a07'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Триггеры уровня оператора с таблицами переходов: один UPDATE счётчика
+# на INSERT/UPDATE/DELETE/COPY независимо от числа затронутых строк.
+COUNT_DOGS = """
+CREATE OR REPLACE FUNCTION count_dogs() RETURNS trigger LANGUAGE plpgsql AS $$
+DECLARE
+    delta bigint := 0;
+BEGIN
+    IF TG_OP = 'TRUNCATE' THEN
+        UPDATE counter SET value = 0 WHERE name = 'dogs_total';
+        RETURN NULL;
+    END IF;
+    IF TG_OP = 'INSERT' THEN
+        SELECT count(*) INTO delta FROM new_rows;
+    ELSIF TG_OP = 'DELETE' THEN
+        SELECT -count(*) INTO delta FROM old_rows;
+    END IF;
+    IF delta <> 0 THEN
+        UPDATE counter SET value = value + delta WHERE name = 'dogs_total';
+    END IF;
+    RETURN NULL;
+END;
+$$
+"""
+
+COUNT_NEW_REQUESTS = """
+CREATE OR REPLACE FUNCTION count_new_requests() RETURNS trigger LANGUAGE plpgsql AS $$
+DECLARE
+    delta bigint := 0;
+BEGIN
+    IF TG_OP = 'TRUNCATE' THEN
+        UPDATE counter SET value = 0 WHERE name = 'new_requests';
+        RETURN NULL;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        delta := delta + (SELECT count(*) FROM new_rows WHERE status = 'NEW');
+    END IF;
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        delta := delta - (SELECT count(*) FROM old_rows WHERE status = 'NEW');
+    END IF;
+    IF delta <> 0 THEN
+        UPDATE counter SET value = value + delta WHERE name = 'new_requests';
+    END IF;
+    RETURN NULL;
+END;
+$$
+"""
+
+TRIGGERS = (
+    "CREATE TRIGGER dog_count_insert AFTER INSERT ON dog "
+    "REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION count_dogs()",
+    "CREATE TRIGGER dog_count_delete AFTER DELETE ON dog "
+    "REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT EXECUTE FUNCTION count_dogs()",
+    "CREATE TRIGGER dog_count_truncate AFTER TRUNCATE ON dog "
+    "FOR EACH STATEMENT EXECUTE FUNCTION count_dogs()",
+    "CREATE TRIGGER request_count_insert AFTER INSERT ON request "
+    "REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION count_new_requests()",
+    "CREATE TRIGGER request_count_update AFTER UPDATE ON request "
+    "REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows "
+    "FOR EACH STATEMENT EXECUTE FUNCTION count_new_requests()",
+    "CREATE TRIGGER request_count_delete AFTER DELETE ON request "
+    "REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT EXECUTE FUNCTION count_new_requests()",
+    "CREATE TRIGGER request_count_truncate AFTER TRUNCATE ON request "
+    "FOR EACH STATEMENT EXECUTE FUNCTION count_new_requests()",
+)
+
+
+def upgrade() -> None:
+    op.create_table('counter',
+    sa.Column('name', sa.String(length=32), nullable=False),
+    sa.Column('value', sa.BigInteger(), nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+    op.execute(
+        "INSERT INTO counter (name, value) VALUES "
+        "('dogs_total', (SELECT count(*) FROM dog)), "
+        "('new_requests', (SELECT count(*) FROM request WHERE status = 'NEW'))"
+    )
+    op.execute(COUNT_DOGS)
+    op.execute(COUNT_NEW_REQUESTS)
+    for trigger in TRIGGERS:
+        op.execute(trigger)
+
+
+def downgrade() -> None:
+    for table, trigger in (('request', 'request_count_truncate'),
+                           ('request', 'request_count_delete'),
+                           ('request', 'request_count_update'),
+                           ('request', 'request_count_insert'),
+                           ('dog', 'dog_count_truncate'),
+                           ('dog', 'dog_count_delete'),
+                           ('dog', 'dog_count_insert')):
+        op.execute(f"DROP TRIGGER {trigger} ON {table}")
+    op.execute("DROP FUNCTION count_new_requests()")
+    op.execute("DROP FUNCTION count_dogs()")
+    op.drop_table('counter')
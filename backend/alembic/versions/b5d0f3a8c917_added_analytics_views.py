@@ -0,0 +1,101 @@
+"""added analytics materialized views
+
+Revision ID: b5d0f3a8c917
+Revises: a7c3e95f1d26
+Create Date: 2026-10-19 00:27:51.903442
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b5d0f3a8c917'
+down_revision: Union[str, None] = 'a7c3e95f1d26'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+REQUEST_STATUS_DAILY = """
+CREATE MATERIALIZED VIEW request_status_daily AS
+SELECT date_trunc('day', created_at)::date AS day,
+       status,
+       count(*) AS request_count,
+       sum(count(*)) OVER (PARTITION BY status
+                           ORDER BY date_trunc('day', created_at))::bigint AS running_total
+FROM request
+GROUP BY date_trunc('day', created_at), status
+"""
+
+# До этой миграции closed_at нигде не заполнялся. Завершённым заявкам ставится
+# время фиксации последнего изменения строки, если PostgreSQL его хранит
+# (track_commit_timestamp), иначе created_at.
+BACKFILL_CLOSED_AT = """
+DO $$
+BEGIN
+    IF current_setting('track_commit_timestamp') = 'on' THEN
+        UPDATE request
+        SET closed_at = greatest(coalesce(pg_xact_commit_timestamp(xmin)::timestamp, created_at),
+                                 created_at)
+        WHERE status = 'COMPLETED' AND closed_at IS NULL;
+    ELSE
+        UPDATE request SET closed_at = created_at
+        WHERE status = 'COMPLETED' AND closed_at IS NULL;
+    END IF;
+END
+$$
+"""
+
+# Строки с closed_at = created_at получены заполнением выше: настоящая длительность
+# у них неизвестна, поэтому они учитываются в closed_count, но не в длительностях.
+REQUEST_CLOSE_TIME = """
+CREATE MATERIALIZED VIEW request_close_time AS
+SELECT date_trunc('month', closed_at)::date AS month,
+       type,
+       count(*) AS closed_count,
+       (avg(extract(epoch FROM closed_at - created_at)) FILTER (WHERE closed_at > created_at)
+        / 3600)::float8 AS avg_hours,
+       (percentile_cont(0.5) WITHIN GROUP (ORDER BY extract(epoch FROM closed_at - created_at))
+        FILTER (WHERE closed_at > created_at) / 3600)::float8 AS median_hours,
+       (sum(sum(extract(epoch FROM closed_at - created_at))
+            FILTER (WHERE closed_at > created_at)) OVER w
+        / nullif(sum(count(*) FILTER (WHERE closed_at > created_at)) OVER w, 0)
+        / 3600)::float8 AS rolling_avg_hours
+FROM request
+WHERE closed_at IS NOT NULL
+GROUP BY date_trunc('month', closed_at), type
+WINDOW w AS (PARTITION BY type ORDER BY date_trunc('month', closed_at)
+             ROWS BETWEEN 2 PRECEDING AND CURRENT ROW)
+"""
+
+DOG_INTAKE_MONTHLY = """
+CREATE MATERIALIZED VIEW dog_intake_monthly AS
+SELECT date_trunc('month', intake_date)::date AS month,
+       count(*) AS intake_count,
+       (sum(count(*)) OVER w)::bigint AS cumulative_count,
+       count(*) - lag(count(*)) OVER w AS change
+FROM dog
+WHERE intake_date IS NOT NULL
+GROUP BY date_trunc('month', intake_date)
+WINDOW w AS (ORDER BY date_trunc('month', intake_date))
+"""
+
+
+def upgrade() -> None:
+    op.execute(BACKFILL_CLOSED_AT)
+    op.execute(REQUEST_STATUS_DAILY)
+    op.execute(REQUEST_CLOSE_TIME)
+    op.execute(DOG_INTAKE_MONTHLY)
+    # REFRESH ... CONCURRENTLY требует уникального индекса по всем строкам представления
+    op.create_index('ux_request_status_daily_day_status', 'request_status_daily',
+                    ['day', 'status'], unique=True)
+    op.create_index('ux_request_close_time_month_type', 'request_close_time',
+                    ['month', 'type'], unique=True)
+    op.create_index('ux_dog_intake_monthly_month', 'dog_intake_monthly', ['month'], unique=True)
+
+
+def downgrade() -> None:
+    # Заполненный closed_at не откатывается: он не отличим от проставленного приложением
+    op.execute("DROP MATERIALIZED VIEW dog_intake_monthly")
+    op.execute("DROP MATERIALIZED VIEW request_close_time")
+    op.execute("DROP MATERIALIZED VIEW request_status_daily")
@@ -0,0 +1,67 @@
+"""Задержка event loop при одновременных входах: Argon2 в loop и в пуле потоков.
+
+Запуск из каталога backend:
+    python -m benchmarks.bench_hashing --logins 32
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from src.utils.hashing import (ARGON2_TIME_COST, ARGON2_MEMORY_COST, HASH_WORKERS, pwd_context,
+                               verify_password)
+
+TICK_INTERVAL = 0.005
+
+
+async def measure_lag(stop: asyncio.Event) -> list[float]:
+    """Насколько позже запланированного просыпается тикер, в миллисекундах."""
+    lags = []
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        expected = loop.time() + TICK_INTERVAL
+        await asyncio.sleep(TICK_INTERVAL)
+        lags.append((loop.time() - expected) * 1000)
+    return lags
+
+
+async def blocking_login(password: str, hashed: str) -> bool:
+    return pwd_context.verify(password, hashed)
+
+
+async def pooled_login(password: str, hashed: str) -> bool:
+    return await verify_password(password, hashed)
+
+
+async def run_case(login, logins: int, hashed: str) -> dict:
+    stop = asyncio.Event()
+    ticker = asyncio.create_task(measure_lag(stop))
+    await asyncio.sleep(TICK_INTERVAL * 2)
+    started = time.perf_counter()
+    await asyncio.gather(*(login("password", hashed) for _ in range(logins)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    lags = await ticker
+    percentiles = statistics.quantiles(lags, n=100, method="inclusive") if len(lags) > 1 else lags
+    return {
+        "elapsed_s": elapsed,
+        "lag_p50_ms": statistics.median(lags),
+        "lag_p99_ms": percentiles[-1],
+        "lag_max_ms": max(lags),
+    }
+
+
+async def main(logins: int):
+    hashed = pwd_context.hash("password")
+    print(f"{logins} одновременных входов, time_cost={ARGON2_TIME_COST}, "
+          f"memory_cost={ARGON2_MEMORY_COST} КиБ, потоков {HASH_WORKERS}")
+    for name, login in (("в event loop", blocking_login), ("в пуле потоков", pooled_login)):
+        result = await run_case(login, logins, hashed)
+        print(f"{name:>16}: всего {result['elapsed_s']:.2f} с, задержка loop "
+              f"p50 {result['lag_p50_ms']:.1f} мс, p99 {result['lag_p99_ms']:.1f} мс, "
+              f"max {result['lag_max_ms']:.1f} мс")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--logins", type=int, default=32)
+    asyncio.run(main(parser.parse_args().logins))
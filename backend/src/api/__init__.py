@@ -7,6 +7,8 @@ from src.api.setup_server import router as setup_router
 from src.api.tags import router as tags_router
 from src.api.requests import router as requests_router
 from src.api.stats import router as stats_router
+from src.api.uploads import router as uploads_router
+from src.api.images import router as images_router
 
 main_router = APIRouter()
 
@@ -18,3 +20,5 @@ main_router.include_router(users_router)
 main_router.include_router(auth_router)
 main_router.include_router(requests_router)
 main_router.include_router(stats_router)
+main_router.include_router(uploads_router)
+main_router.include_router(images_router)
@@ -1,30 +1,89 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+import math
+import time
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from src.database import get_session
 from src.models.user import UserModel
-from src.utils.auth import create_access_token
-from src.utils.hashing import verify_password
-from src.schemas.auth import Token
+from src.utils.auth import CurrentUser, create_access_token, get_current_user
+from src.utils.hashing import verify_and_update
+from src.utils.throttle import (LOGIN_THROTTLE_WINDOW, LOGIN_MAX_ATTEMPTS_PER_IP,
+                                LOGIN_MAX_ATTEMPTS_PER_USERNAME, login_limiter, login_metrics,
+                                verify_timer)
+from src.schemas.auth import Token, LoginMetricsSchema
 
 router = APIRouter(prefix="/auth", tags=["Auth"])
 
+
+def _raise_if_throttled(retry_after: float | None, metric: str):
+    if retry_after is None:
+        return
+    login_metrics[metric] += 1
+    raise HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail="Слишком много попыток входа. Попробуйте позже",
+        headers={"Retry-After": str(math.ceil(retry_after))},
+    )
+
 @router.post("/login", response_model=Token)
 async def login(
+    request: Request,
     form_data: OAuth2PasswordRequestForm = Depends(),
     session: AsyncSession = Depends(get_session)
 ):
+    login_metrics["attempts"] += 1
+    client_ip = request.client.host if request.client else "unknown"
+    username_key = f"login:user:{form_data.username.casefold()}"
+    # С адреса учитывается каждая попытка, а для имени пользователя только неудачные:
+    # иначе владельца учётной записи мог бы заблокировать кто угодно
+    retry_after = await login_limiter.hit(f"login:ip:{client_ip}", LOGIN_MAX_ATTEMPTS_PER_IP,
+                                          LOGIN_THROTTLE_WINDOW)
+    _raise_if_throttled(retry_after, "throttled_ip")
+    retry_after = await login_limiter.peek(username_key, LOGIN_MAX_ATTEMPTS_PER_USERNAME,
+                                           LOGIN_THROTTLE_WINDOW)
+    _raise_if_throttled(retry_after, "throttled_username")
+
     query = select(UserModel).where(UserModel.username == form_data.username)
     result = await session.execute(query)
     user = result.scalar_one_or_none()
 
-    if not user or not verify_password(form_data.password, user.password):
+    valid, new_hash = False, None
+    if user:
+        started = time.perf_counter()
+        valid, new_hash = await verify_and_update(form_data.password, user.password)
+        verify_timer.observe(time.perf_counter() - started)
+    else:
+        login_metrics["unknown_username"] += 1
+        await verify_timer.imitate()
+    if not valid:
+        login_metrics["failed"] += 1
+        await login_limiter.hit(username_key, LOGIN_MAX_ATTEMPTS_PER_USERNAME,
+                                LOGIN_THROTTLE_WINDOW)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Неверное имя пользователя или пароль",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    if new_hash:
+        user.password = new_hash
+        await session.commit()
 
+    await login_limiter.reset(username_key)
+    login_metrics["succeeded"] += 1
     access_token = create_access_token(data={"sub": str(user.id)})
     return {"access_token": access_token, "token_type": "bearer"}
+
+
+@router.get("/throttle-metrics", response_model=LoginMetricsSchema)
+async def get_login_metrics(current_user: CurrentUser = Depends(get_current_user)):
+    """Счётчики попыток входа в этом воркере с момента запуска."""
+    return LoginMetricsSchema(
+        attempts=login_metrics["attempts"],
+        succeeded=login_metrics["succeeded"],
+        failed=login_metrics["failed"],
+        unknown_username=login_metrics["unknown_username"],
+        throttled_ip=login_metrics["throttled_ip"],
+        throttled_username=login_metrics["throttled_username"],
+        average_verify_ms=verify_timer.average * 1000,
+    )
@@ -1,25 +1,47 @@
+import random
 from datetime import date
-from typing import Optional
-from pathlib import Path
-from fastapi import APIRouter, HTTPException, UploadFile, File, Form, Depends
-from sqlalchemy import select, func
+from typing import Optional, Annotated
+import asyncpg
+from fastapi import (APIRouter, HTTPException, UploadFile, File, Form, Depends, Query, Request,
+                     Response)
+from sqlalchemy import select, func, tablesample, tuple_
 from sqlalchemy.orm import selectinload
-from src.enums import GenderEnum
+from sqlalchemy.exc import DBAPIError
+from src.enums import GenderEnum, DataFormatEnum
 from src.utils.validate_image import validate_and_save_dog_image
-from src.models.tags import TagModel
+from src.utils.image_store import acquire_image, release_image
 from src.utils.validate_array import parse_tag_ids
-from src.utils.auth import UserModel
+from src.utils.pagination import encode_cursor, decode_cursor
+from src.utils.dog_filters import (apply_dog_filters, age_bucket_expression,
+                                   filters_signature, dog_facets_cache)
+from src.utils.dog_pool import dog_image_pool
+from src.utils.tag_registry import tag_registry
+from src.utils.dog_import import DogImporter, iter_batches, detect_format, load_tag_map
+from src.utils.auth import CurrentUser
 from src.utils.auth import get_current_user
+from src.utils.etag import DOGS, TAGS, conditional_get
+from src.utils.invalidation import publish_changes
 from src.api.dependencies import SessionDep
 from src.models.dogs import DogModel
-from src.schemas.dogs import DogResponseSchema, DogImagesRandomSchema
+from src.models.tags_dogs import tag_dog
+from src.schemas.dogs import (DogResponseSchema, DogImagesRandomSchema,
+                              DogListQuerySchema, DogPageSchema,
+                              DogSearchQuerySchema, DogSearchResultSchema,
+                              DogSearchPageSchema, DogFilterSchema,
+                              DogFacetsSchema, FacetCountSchema, TagFacetSchema,
+                              DogImportReportSchema)
 
 router = APIRouter(prefix="/dogs", tags=["Dogs"])
 
+RANDOM_DOGS_COUNT = 5
+COLD_SAMPLE_PERCENT = 1
+SEARCH_HEADLINE_OPTIONS = ("StartSel=<mark>, StopSel=</mark>, "
+                           "MaxFragments=2, MaxWords=30, MinWords=10")
+
 @router.post("", response_model=DogResponseSchema)
 async def add_dog_with_avatar(
     session: SessionDep,
-    current_user: UserModel = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     name: str = Form(...),
     age: int = Form(...),
     breed: str = Form(...),
@@ -29,9 +51,8 @@ async def add_dog_with_avatar(
     gender: GenderEnum = Form(...),
     tag_ids: Optional[str] = Form(None),
     file: UploadFile = File(None),
+    image_key: Optional[str] = Form(None),
 ):
-    image_url = await validate_and_save_dog_image(file)
-
     parsed_intake_date = None
     if intake_date:
         try:
@@ -50,10 +71,13 @@ async def add_dog_with_avatar(
             raise HTTPException(400, "tag_ids должен быть "
                                      "JSON-списком целых чисел, например: [1,2,3]")
 
-        result = await session.execute(select(TagModel).where(TagModel.id.in_(ids_list)))
-        tags = result.scalars().all()
-        if len(tags) != len(set(ids_list)):
+        if tag_registry.missing(ids_list):
             raise HTTPException(400, "Один или несколько тегов не найдены")
+        tags = await tag_registry.attach(session, ids_list)
+
+    # Изображение сохраняется только после проверки остальных полей
+    image_url = await validate_and_save_dog_image(file, image_key)
+    image_variants = await acquire_image(session, image_url)
 
     new_dog = DogModel(
         name=name,
@@ -64,10 +88,13 @@ async def add_dog_with_avatar(
         veterinary_passport=veterinary_passport,
         gender=gender,
         image_url=image_url,
+        image_variants=image_variants,
         tags=tags,
     )
 
     session.add(new_dog)
+    await tag_registry.flush(session)
+    await publish_changes(session, DOGS)
     await session.commit()
 
     result = await session.execute(
@@ -76,27 +103,204 @@ async def add_dog_with_avatar(
         .where(new_dog.id == DogModel.id)
     )
     dog_with_tags = result.scalar_one()
+    dog_image_pool.upsert(dog_with_tags.id, dog_with_tags.image_url,
+                          dog_with_tags.image_variants)
+    await dog_facets_cache.clear()
     return dog_with_tags
 
 
+@router.post("/import", response_model=DogImportReportSchema)
+async def import_dogs(
+    session: SessionDep,
+    current_user: CurrentUser = Depends(get_current_user),
+    file: UploadFile = File(...),
+    file_format: Optional[DataFormatEnum] = Form(None),
+    batch_size: int = Form(500, ge=1, le=10000),
+    atomic: bool = Form(True),
+):
+    """Массовый импорт собак из CSV или NDJSON.
+
+    При atomic=true весь файл загружается одной транзакцией, иначе каждая
+    порция из batch_size строк фиксируется отдельно.
+    """
+    importer = DogImporter(session, await load_tag_map(session))
+    try:
+        async for batch in iter_batches(file, detect_format(file, file_format), batch_size):
+            resolved = valid = await importer.check_images(importer.validate(batch))
+            try:
+                resolved = await importer.resolve_images(valid)
+                loaded = await importer.copy(resolved)
+                if not atomic:
+                    await publish_changes(session, DOGS)
+                    await session.commit()
+            # COPY идёт напрямую через asyncpg, его ошибки не оборачиваются в DBAPIError
+            except (DBAPIError, asyncpg.PostgresError) as exc:
+                await session.rollback()
+                if atomic:
+                    raise HTTPException(400, f"Импорт отменён: {getattr(exc, 'orig', exc)}")
+                importer.reject(resolved, exc)
+                continue
+            importer.accept(loaded)
+        if atomic and importer.imported:
+            # Строка версии блокируется до commit, поэтому её меняем в самом конце,
+            # а не после каждой порции
+            await publish_changes(session, DOGS)
+        await session.commit()
+    except ValueError as exc:
+        await session.rollback()
+        raise HTTPException(400, str(exc))
+
+    for dog_id, image_url, image_variants in importer.imported:
+        dog_image_pool.upsert(dog_id, image_url, image_variants)
+    await dog_facets_cache.clear()
+    return importer.report()
+
+
 @router.get("/random", response_model=list[DogImagesRandomSchema])
 async def get_random_dogs(session: SessionDep):
-    query = select(DogModel).where(DogModel.image_url.isnot(None)).order_by(func.random()).limit(5)
+    if dog_image_pool.is_loaded:
+        return dog_image_pool.sample(RANDOM_DOGS_COUNT)
+
+    dog_image_pool.warm()
+    sampled = tablesample(DogModel.__table__, func.system(COLD_SAMPLE_PERCENT))
+    result = await session.execute(
+        select(sampled.c.id, sampled.c.image_url, sampled.c.image_variants)
+        .where(sampled.c.image_url.isnot(None))
+    )
+    rows = result.all()
+    if len(rows) < RANDOM_DOGS_COUNT:
+        result = await session.execute(
+            select(DogModel.id, DogModel.image_url, DogModel.image_variants)
+            .where(DogModel.image_url.isnot(None))
+            .order_by(func.random())
+            .limit(RANDOM_DOGS_COUNT)
+        )
+        rows = result.all()
+    return [DogImagesRandomSchema(id=dog_id, image_url=image_url, image_variants=image_variants)
+            for dog_id, image_url, image_variants
+            in random.sample(rows, min(RANDOM_DOGS_COUNT, len(rows)))]
+
+
+
+@router.get("/facets", response_model=DogFacetsSchema)
+async def get_dog_facets(
+    session: SessionDep,
+    params: Annotated[DogFilterSchema, Query()],
+):
+    signature = filters_signature(params)
+    cached = await dog_facets_cache.get(signature)
+    if cached is not None:
+        return DogFacetsSchema.model_validate(cached)
+
+    filtered = apply_dog_filters(
+        select(DogModel.id, DogModel.breed, DogModel.gender,
+               age_bucket_expression().label("age_bucket")),
+        params,
+    ).subquery()
+    grouped = (tag_dog.c.tag_id, filtered.c.breed, filtered.c.gender, filtered.c.age_bucket)
+    query = (
+        select(*grouped,
+               func.grouping(*grouped).label("grouping"),
+               func.count(filtered.c.id.distinct()).label("count"))
+        .select_from(filtered)
+        .outerjoin(tag_dog, tag_dog.c.dog_id == filtered.c.id)
+        .group_by(func.grouping_sets(*[tuple_(column) for column in grouped], tuple_()))
+    )
     result = await session.execute(query)
-    dogs = result.scalars().all()
-    return dogs
 
+    # GROUPING() ставит бит 1 для каждого столбца, не входящего в набор группировки
+    facets = DogFacetsSchema(total=0, tags=[], breeds=[], genders=[], age_buckets=[])
+    for tag_id, breed, gender, bucket, grouping, count in result.all():
+        if grouping == 0b0111 and tag_id is not None:
+            facets.tags.append(TagFacetSchema(id=tag_id, count=count))
+        elif grouping == 0b1011:
+            facets.breeds.append(FacetCountSchema(value=breed, count=count))
+        elif grouping == 0b1101:
+            facets.genders.append(FacetCountSchema(value=gender.value, count=count))
+        elif grouping == 0b1110:
+            facets.age_buckets.append(FacetCountSchema(value=bucket, count=count))
+        elif grouping == 0b1111:
+            facets.total = count
+
+    await dog_facets_cache.set(signature, facets.model_dump(mode="json"))
+    return facets
+
+
+@router.get("/search", response_model=DogSearchPageSchema)
+async def search_dogs(
+    session: SessionDep,
+    params: Annotated[DogSearchQuerySchema, Query()],
+):
+    ts_query = func.websearch_to_tsquery("russian", params.q)
+    rank = func.ts_rank_cd(DogModel.search_vector, ts_query)
+    headline = func.ts_headline("russian", DogModel.description, ts_query,
+                                SEARCH_HEADLINE_OPTIONS)
+    query = (
+        select(DogModel, rank.label("rank"), headline.label("headline"))
+        .options(selectinload(DogModel.tags))
+        .where(DogModel.search_vector.op("@@")(ts_query))
+        .order_by(rank.desc(), DogModel.id.desc())
+        .offset(params.offset)
+        .limit(params.limit + 1)
+    )
+    result = await session.execute(query)
+    rows = result.all()
+
+    next_offset = None
+    if len(rows) > params.limit:
+        rows = rows[:params.limit]
+        next_offset = params.offset + params.limit
+
+    items = [
+        DogSearchResultSchema(
+            **DogResponseSchema.model_validate(dog).model_dump(),
+            rank=dog_rank,
+            headline=dog_headline,
+        )
+        for dog, dog_rank, dog_headline in rows
+    ]
+    return DogSearchPageSchema(items=items, next_offset=next_offset)
+
+
+@router.get("", response_model=DogPageSchema)
+async def get_dogs(
+    session: SessionDep,
+    params: Annotated[DogListQuerySchema, Query()],
+    request: Request,
+    response: Response,
+):
+    not_modified = await conditional_get(session, request, response, DOGS, TAGS)
+    if not_modified:
+        return not_modified
 
+    query = apply_dog_filters(select(DogModel), params)
 
-@router.get("", response_model=list[DogResponseSchema])
-async def get_dogs(session: SessionDep):
-    query = select(DogModel).options(selectinload(DogModel.tags))
+    after = decode_cursor(params.cursor)
+    if after is not None:
+        try:
+            query = query.where(DogModel.id < int(after["id"]))
+        except (KeyError, TypeError, ValueError):
+            raise HTTPException(400, "Неверный курсор пагинации")
+
+    query = (query
+             .options(selectinload(DogModel.tags))
+             .order_by(DogModel.id.desc())
+             .limit(params.limit + 1))
     result = await session.execute(query)
-    return result.scalars().all()
+    dogs = result.scalars().all()
+
+    next_cursor = None
+    if len(dogs) > params.limit:
+        dogs = dogs[:params.limit]
+        next_cursor = encode_cursor({"id": dogs[-1].id})
+    return DogPageSchema(items=dogs, next_cursor=next_cursor)
 
 
 @router.get("/{dog_id}", response_model=DogResponseSchema)
-async def get_dog(dog_id: int, session: SessionDep):
+async def get_dog(dog_id: int, session: SessionDep, request: Request, response: Response):
+    not_modified = await conditional_get(session, request, response, DOGS, TAGS)
+    if not_modified:
+        return not_modified
     query = select(DogModel).options(selectinload(DogModel.tags)).where(dog_id == DogModel.id)
     result = await session.execute(query)
     dog = result.scalar_one_or_none()
@@ -109,7 +313,7 @@ async def get_dog(dog_id: int, session: SessionDep):
 async def put_dog(
     dog_id: int,
     session: SessionDep,
-    current_user: UserModel = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     name: str = Form(...),
     age: int = Form(...),
     breed: str = Form(...),
@@ -119,6 +323,7 @@ async def put_dog(
     gender: GenderEnum = Form(...),
     tag_ids: Optional[str] = Form(None),
     file: UploadFile = File(None),
+    image_key: Optional[str] = Form(None),
 ):
     query = select(DogModel).options(selectinload(DogModel.tags)).where(DogModel.id == dog_id)
     result = await session.execute(query)
@@ -126,8 +331,6 @@ async def put_dog(
     if dog is None:
         raise HTTPException(status_code=404, detail="Информация о собаке не найдена")
 
-    image_url = await validate_and_save_dog_image(file)
-
     parsed_intake_date = None
     if intake_date:
         try:
@@ -143,10 +346,13 @@ async def put_dog(
         except (ValueError, TypeError):
             raise HTTPException(400, "tag_ids должен быть JSON-списком целых чисел")
 
-        result_tags = await session.execute(select(TagModel).where(TagModel.id.in_(ids_list)))
-        tags = result_tags.scalars().all()
-        if len(tags) != len(set(ids_list)):
+        if tag_registry.missing(ids_list):
             raise HTTPException(400, "Один или несколько тегов не найдены")
+        tags = await tag_registry.attach(session, ids_list)
+
+    image_url = await validate_and_save_dog_image(file, image_key)
+    image_variants = await acquire_image(session, image_url)
+    await release_image(session, dog.image_url, dog.image_variants)
 
     dog.name = name
     dog.age = age
@@ -156,10 +362,15 @@ async def put_dog(
     dog.veterinary_passport = veterinary_passport
     dog.gender = gender
     dog.image_url = image_url
+    dog.image_variants = image_variants
     dog.tags = tags
 
+    await tag_registry.flush(session)
+    await publish_changes(session, DOGS)
     await session.commit()
     await session.refresh(dog)
+    dog_image_pool.upsert(dog.id, dog.image_url, dog.image_variants)
+    await dog_facets_cache.clear()
     return dog
 
 
@@ -168,7 +379,7 @@ async def put_dog(
 async def partial_update_dog(
         dog_id: int,
         session: SessionDep,
-        current_user: UserModel = Depends(get_current_user),
+        current_user: CurrentUser = Depends(get_current_user),
         name: Optional[str] = Form(None),
         age: Optional[int] = Form(None),
         breed: Optional[str] = Form(None),
@@ -178,6 +389,7 @@ async def partial_update_dog(
         gender: Optional[GenderEnum] = Form(None),
         tag_ids: Optional[str] = Form(None),
         file: UploadFile = File(None),
+        image_key: Optional[str] = Form(None),
 ):
     query = select(DogModel).options(selectinload(DogModel.tags)).where(dog_id == DogModel.id)
     result = await session.execute(query)
@@ -207,10 +419,6 @@ async def partial_update_dog(
         except ValueError:
             raise HTTPException(400, "Неверный формат даты. Используйте YYYY-MM-DD")
 
-    if file:
-        image_url = await validate_and_save_dog_image(file)
-        update_dict["image_url"] = image_url
-
     if tag_ids is not None:
         try:
             ids_list = parse_tag_ids(tag_ids)
@@ -218,26 +426,34 @@ async def partial_update_dog(
             raise HTTPException(400, "tag_ids должен быть JSON-списком целых чисел")
 
         if ids_list:
-            result_tags = await session.execute(select(TagModel).where(TagModel.id.in_(ids_list)))
-            tags = result_tags.scalars().all()
-            if len(tags) != len(set(ids_list)):
+            if tag_registry.missing(ids_list):
                 raise HTTPException(400, "Один или несколько тегов не найдены")
-            dog.tags = tags
+            dog.tags = await tag_registry.attach(session, ids_list)
         else:
             dog.tags = []
 
+    if file or image_key:
+        image_url = await validate_and_save_dog_image(file, image_key)
+        update_dict["image_variants"] = await acquire_image(session, image_url)
+        update_dict["image_url"] = image_url
+        await release_image(session, dog.image_url, dog.image_variants)
+
     for key, value in update_dict.items():
         setattr(dog, key, value)
 
+    await tag_registry.flush(session)
+    await publish_changes(session, DOGS)
     await session.commit()
     await session.refresh(dog)
+    dog_image_pool.upsert(dog.id, dog.image_url, dog.image_variants)
+    await dog_facets_cache.clear()
     return dog
 
 
 @router.delete("/{dog_id}")
 async def delete_dog(dog_id: int,
                      session: SessionDep,
-                     current_user: UserModel = Depends(get_current_user)):
+                     current_user: CurrentUser = Depends(get_current_user)):
     query = select(DogModel).where(dog_id == DogModel.id)
     result = await session.execute(query)
     dog = result.scalar_one_or_none()
@@ -245,13 +461,11 @@ async def delete_dog(dog_id: int,
     if dog is None:
         raise HTTPException(status_code=404, detail="Информация о собаке не найдена")
 
-    if dog.image_url:
-        relative_path = dog.image_url.lstrip("/")
-        file_path = Path(relative_path)
-        if file_path.exists():
-            file_path.unlink()
-
+    await release_image(session, dog.image_url, dog.image_variants)
 
     await session.delete(dog)
+    await publish_changes(session, DOGS)
     await session.commit()
+    dog_image_pool.discard(dog_id)
+    await dog_facets_cache.clear()
     return {"message": f"Информация о собаке с {dog_id} удалена успешна"}
@@ -0,0 +1,61 @@
+import asyncio
+from pathlib import PurePosixPath
+from typing import Annotated
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import FileResponse, Response
+from src.enums import ImageFormatEnum, UploadKindEnum
+from src.schemas.images import ImageResizeQuerySchema
+from src.utils.image_resize import SOURCE_FORMATS, image_resizer
+from src.utils.static_files import (IMMUTABLE_CACHE_CONTROL, REVALIDATE_CACHE_CONTROL,
+                                    accepts_webp, is_fingerprinted)
+from src.utils.storage import storage, staging_path
+from src.utils.etag import etag_matches
+
+
+router = APIRouter(prefix="/images", tags=["Images"])
+
+UPLOAD_KINDS = {kind.value for kind in UploadKindEnum}
+
+
+@router.get("/{path:path}")
+async def get_resized_image(path: str, request: Request,
+                            params: Annotated[ImageResizeQuerySchema, Query()]):
+    """Уменьшенная копия загруженного изображения.
+
+    Исходники читаются из локального каталога static/, поэтому при
+    STORAGE_BACKEND=s3 (после публикации локальных копий нет) эндпоинт
+    отключён: ресайз в этом случае выполняет CDN перед хранилищем.
+    """
+    if not storage.is_local:
+        raise HTTPException(501, "Изменение размера доступно только для локального хранилища")
+    parts = PurePosixPath(path).parts
+    ext = PurePosixPath(path).suffix.lstrip(".").lower()
+    if len(parts) < 2 or parts[0] not in UPLOAD_KINDS or ".." in parts or ext not in SOURCE_FORMATS:
+        raise HTTPException(404, "Изображение не найдено")
+    source = staging_path(path)
+    try:
+        stat_result = await asyncio.to_thread(source.stat)
+    except OSError:
+        raise HTTPException(404, "Изображение не найдено")
+
+    fmt = params.fmt
+    if fmt is None and accepts_webp(request.scope):
+        fmt = ImageFormatEnum.WEBP
+    elif fmt is None:
+        fmt = SOURCE_FORMATS[ext]
+        if fmt == ImageFormatEnum.WEBP:
+            fmt = ImageFormatEnum.JPEG
+
+    name = image_resizer.variant_name(source, stat_result.st_mtime_ns, params.w, params.h, fmt)
+    headers = {
+        "etag": f'"{PurePosixPath(name).stem}"',
+        "cache-control": (IMMUTABLE_CACHE_CONTROL if is_fingerprinted(path)
+                          else REVALIDATE_CACHE_CONTROL),
+    }
+    if params.fmt is None:
+        headers["vary"] = "Accept"
+    if etag_matches(request.headers.get("if-none-match"), headers["etag"]):
+        return Response(status_code=304, headers=headers)
+
+    variant = await image_resizer.get(source, name, params.w, params.h, fmt)
+    return FileResponse(variant, media_type=f"image/{fmt.value}", headers=headers)
@@ -1,17 +1,19 @@
-from pathlib import Path
 from typing import Union
 from datetime import datetime
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Request, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
+from sqlalchemy.orm import selectinload
 from src.database import get_session
 from src.models.news import NewsModel
-from src.models.tags import TagModel
 from src.schemas.news import NewsGetSchema
-from src.models.user import UserModel
-from src.utils.auth import get_current_user
+from src.utils.auth import CurrentUser, get_current_user
+from src.utils.etag import NEWS, TAGS, conditional_get
+from src.utils.invalidation import publish_changes
 from src.utils.validate_image import validate_and_save_news_image
+from src.utils.image_store import acquire_image, release_image
 from src.utils.validate_array import parse_tag_ids
+from src.utils.tag_registry import tag_registry
 from src.api.dependencies import SessionDep
 
 
@@ -20,7 +22,7 @@ router = APIRouter(prefix="/news", tags=["News"])
 @router.post("/", response_model=NewsGetSchema)
 async def add_news(
     session: AsyncSession = Depends(get_session),
-    current_user: UserModel = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     title: str = Form(...),
     body: str = Form(...),
     tag_ids: str | None = Form(
@@ -29,27 +31,29 @@ async def add_news(
     ),
     preview: str | None = Form(None),
     file: Union[UploadFile, str] = File(None),
+    image_key: str | None = Form(
+        None,
+        description="Ключ файла, загруженного через /uploads/presign"
+    ),
 ):
     """Создать новую новость с привязкой тегов по ID."""
     if isinstance(file, str) and file.strip() == "":
         file = None
 
-    image_url = await validate_and_save_news_image(file)
+    image_url = await validate_and_save_news_image(file, image_key)
+    image_variants = await acquire_image(session, image_url)
 
     news_tags = []
     if tag_ids:
         ids = parse_tag_ids(tag_ids)
         if ids:
-            result = await session.execute(select(TagModel).where(TagModel.id.in_(ids)))
-            found_tags = result.scalars().all()
-            found_ids = {t.id for t in found_tags}
-            missing = set(ids) - found_ids
+            missing = tag_registry.missing(ids)
             if missing:
                 raise HTTPException(
                     status_code=400,
                     detail=f"Теги с ID {sorted(missing)} не найдены."
                 )
-            news_tags = found_tags
+            news_tags = await tag_registry.attach(session, ids)
 
     new_news = NewsModel(
         title=title,
@@ -58,28 +62,40 @@ async def add_news(
         author_id=current_user.id,
         preview=preview,
         image_url=image_url,
+        image_variants=image_variants,
         tags=news_tags,
     )
     session.add(new_news)
+    await tag_registry.flush(session)
+    await publish_changes(session, NEWS)
     await session.commit()
     await session.refresh(new_news, attribute_names=["tags", "author"])
     return new_news
 
 
 @router.get("/", response_model=list[NewsGetSchema])
-async def get_all_news(session: AsyncSession = Depends(get_session)):
+async def get_all_news(request: Request, response: Response,
+                       session: AsyncSession = Depends(get_session)):
     """Получить все новости с тегами."""
+    not_modified = await conditional_get(session, request, response, NEWS, TAGS)
+    if not_modified:
+        return not_modified
     result = await session.execute(
-        select(NewsModel).options(
-        )
+        select(NewsModel).options(selectinload(NewsModel.tags))
     )
     return result.scalars().all()
 
 
 @router.get("/{news_id}", response_model=NewsGetSchema)
-async def get_news_by_id(news_id: int, session: AsyncSession = Depends(get_session)):
+async def get_news_by_id(news_id: int, request: Request, response: Response,
+                         session: AsyncSession = Depends(get_session)):
     """Получить новость по ID с тегами."""
-    result = await session.execute(select(NewsModel).where(NewsModel.id == news_id))
+    not_modified = await conditional_get(session, request, response, NEWS, TAGS)
+    if not_modified:
+        return not_modified
+    result = await session.execute(
+        select(NewsModel).options(selectinload(NewsModel.tags)).where(NewsModel.id == news_id)
+    )
     news = result.scalar_one_or_none()
     if not news:
         raise HTTPException(status_code=404, detail="Новость не найдена")
@@ -90,7 +106,7 @@ async def get_news_by_id(news_id: int, session: AsyncSession = Depends(get_sessi
 async def update_news(
     news_id: int,
     session: AsyncSession = Depends(get_session),
-    current_user: UserModel = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     title: str = Form(...),
     body: str = Form(...),
     date_str: str = Form(..., description="Дата в формате YYYY-MM-DD HH:MM"),
@@ -100,9 +116,15 @@ async def update_news(
     ),
     preview: str | None = Form(None),
     file: UploadFile = File(None),
+    image_key: str | None = Form(
+        None,
+        description="Ключ файла, загруженного через /uploads/presign"
+    ),
 ):
     """Полное обновление новости с заменой тегов."""
-    result = await session.execute(select(NewsModel).where(NewsModel.id == news_id))
+    result = await session.execute(
+        select(NewsModel).options(selectinload(NewsModel.tags)).where(NewsModel.id == news_id)
+    )
     news = result.scalar_one_or_none()
     if not news:
         raise HTTPException(status_code=404, detail="Новость не найдена")
@@ -115,29 +137,31 @@ async def update_news(
             detail="Неверный формат даты. Используйте: YYYY-MM-DD HH:MM"
         )
 
-    image_url = await validate_and_save_news_image(file)
+    image_url = await validate_and_save_news_image(file, image_key)
+    image_variants = await acquire_image(session, image_url)
+    await release_image(session, news.image_url, news.image_variants)
 
     news.title = title
     news.body = body
     news.date = parsed_date
     news.preview = preview
     news.image_url = image_url
+    news.image_variants = image_variants
 
     news.tags = []
     if tag_ids:
         ids = parse_tag_ids(tag_ids)
         if ids:
-            result = await session.execute(select(TagModel).where(TagModel.id.in_(ids)))
-            found_tags = result.scalars().all()
-            found_ids = {t.id for t in found_tags}
-            missing = set(ids) - found_ids
+            missing = tag_registry.missing(ids)
             if missing:
                 raise HTTPException(
                     status_code=400,
                     detail=f"Теги с ID {sorted(missing)} не найдены."
                 )
-            news.tags = found_tags
+            news.tags = await tag_registry.attach(session, ids)
 
+    await tag_registry.flush(session)
+    await publish_changes(session, NEWS)
     await session.commit()
     await session.refresh(news, attribute_names=["tags", "author"])
     return news
@@ -147,7 +171,7 @@ async def update_news(
 async def partial_update_news(
     news_id: int,
     session: SessionDep,
-    current_user: UserModel = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     title: str | None = Form(None),
     body: str | None = Form(None),
     date_str: str | None = Form(None),
@@ -159,9 +183,15 @@ async def partial_update_news(
     ),
     preview: str | None = Form(None),
     file: UploadFile = File(None),
+    image_key: str | None = Form(
+        None,
+        description="Ключ файла, загруженного через /uploads/presign"
+    ),
 ):
     """Частичное обновление новости. Теги можно обновить или удалить."""
-    result = await session.execute(select(NewsModel).where(NewsModel.id == news_id))
+    result = await session.execute(
+        select(NewsModel).options(selectinload(NewsModel.tags)).where(NewsModel.id == news_id)
+    )
     news = result.scalar_one_or_none()
     if not news:
         raise HTTPException(status_code=404, detail="Новость не найдена")
@@ -185,9 +215,11 @@ async def partial_update_news(
                 detail="Неверный формат даты. Используйте: YYYY-MM-DD HH:MM"
             )
 
-    if file:
-        image_url = await validate_and_save_news_image(file)
+    if file or image_key:
+        image_url = await validate_and_save_news_image(file, image_key)
+        update_data["image_variants"] = await acquire_image(session, image_url)
         update_data["image_url"] = image_url
+        await release_image(session, news.image_url, news.image_variants)
 
     for key, value in update_data.items():
         setattr(news, key, value)
@@ -195,19 +227,18 @@ async def partial_update_news(
     if tag_ids is not None:
         ids = parse_tag_ids(tag_ids)
         if ids:
-            result = await session.execute(select(TagModel).where(TagModel.id.in_(ids)))
-            found_tags = result.scalars().all()
-            found_ids = {t.id for t in found_tags}
-            missing = set(ids) - found_ids
+            missing = tag_registry.missing(ids)
             if missing:
                 raise HTTPException(
                     status_code=400,
                     detail=f"Теги с ID {sorted(missing)} не найдены."
                 )
-            news.tags = found_tags
+            news.tags = await tag_registry.attach(session, ids)
         else:
             news.tags = []
 
+    await tag_registry.flush(session)
+    await publish_changes(session, NEWS)
     await session.commit()
     await session.refresh(news, attribute_names=["tags", "author"])
     return news
@@ -216,21 +247,16 @@ async def partial_update_news(
 @router.delete("/{news_id}")
 async def delete_news(news_id: int,
                       session: AsyncSession = Depends(get_session),
-                      current_user: UserModel = Depends(get_current_user)):
+                      current_user: CurrentUser = Depends(get_current_user)):
     """Удалить новость и связанные данные."""
     result = await session.execute(select(NewsModel).where(NewsModel.id == news_id))
     news = result.scalar_one_or_none()
     if not news:
         raise HTTPException(status_code=404, detail="Новость не найдена")
 
-    if news.image_url:
-        file_path = Path(news.image_url.lstrip("/"))
-        if file_path.exists():
-            try:
-                file_path.unlink()
-            except FileNotFoundError as e:
-                print(f"Ошибка при удалении файла {file_path}: {e}")
+    await release_image(session, news.image_url, news.image_variants)
 
     await session.delete(news)
+    await publish_changes(session, NEWS)
     await session.commit()
     return {"message": "Новость удалена"}
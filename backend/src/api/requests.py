@@ -1,12 +1,24 @@
-from fastapi import APIRouter, HTTPException, Depends
-from sqlalchemy import select
+from datetime import datetime
+from typing import Annotated
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select, update, func, tuple_, any_, literal, Integer
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.orm import selectinload
 from src.api.dependencies import SessionDep
 from src.models.requests import RequestModel, AdoptionRequestModel, GuardianRequestModel
-from src.schemas.requests import RequestCreateSchema, RequestResponseSchema, RequestPatchSchema
-from src.enums import RequestTypeEnum
-from src.utils.auth import UserModel
+from src.schemas.requests import (RequestCreateSchema, RequestResponseSchema,
+                                  RequestPatchSchema, RequestExportQuerySchema,
+                                  RequestListQuerySchema, RequestPageSchema,
+                                  RequestBulkStatusSchema, RequestBulkStatusResultSchema)
+from src.enums import RequestTypeEnum, RequestStatusEnum, RequestSortEnum
+from src.utils.auth import CurrentUser
 from src.utils.auth import get_current_user
+from src.utils.etag import REQUESTS, conditional_get
+from src.utils.invalidation import publish_changes
+from src.utils.request_export import stream_requests, MEDIA_TYPES
+from src.utils.request_filters import apply_request_filters
+from src.utils.pagination import encode_cursor, decode_cursor
 
 router = APIRouter(prefix="/requests", tags=["Requests"])
 
@@ -35,6 +47,7 @@ async def create_request(request_data: RequestCreateSchema,
         guardian = GuardianRequestModel(request_id=request.id)
         session.add(guardian)
 
+    await publish_changes(session, REQUESTS)
     await session.commit()
 
     result = await session.execute(
@@ -48,13 +61,60 @@ async def create_request(request_data: RequestCreateSchema,
     full_request = result.scalar_one()
     return full_request
 
-@router.get("", response_model=list[RequestResponseSchema])
-async def get_requests(session: SessionDep):
-    query = (select(RequestModel)
+@router.get("", response_model=RequestPageSchema)
+async def get_requests(session: SessionDep, request: Request, response: Response,
+                       params: Annotated[RequestListQuerySchema, Query()]):
+    not_modified = await conditional_get(session, request, response, REQUESTS)
+    if not_modified:
+        return not_modified
+
+    query = apply_request_filters(select(RequestModel), params)
+    key = tuple_(RequestModel.created_at, RequestModel.id)
+    newest_first = params.sort == RequestSortEnum.NEWEST
+
+    after = decode_cursor(params.cursor)
+    if after is not None:
+        try:
+            position = tuple_(datetime.fromisoformat(after["created_at"]), int(after["id"]))
+        except (KeyError, TypeError, ValueError):
+            raise HTTPException(400, "Неверный курсор пагинации")
+        query = query.where(key < position if newest_first else key > position)
+
+    if newest_first:
+        query = query.order_by(RequestModel.created_at.desc(), RequestModel.id.desc())
+    else:
+        query = query.order_by(RequestModel.created_at, RequestModel.id)
+    query = (query
              .options(selectinload(RequestModel.adoption_request),
-                      selectinload(RequestModel.guardian_request)))
+                      selectinload(RequestModel.guardian_request))
+             .limit(params.limit + 1))
     result = await session.execute(query)
-    return result.scalars().all()
+    requests = result.scalars().all()
+
+    next_cursor = None
+    if len(requests) > params.limit:
+        requests = requests[:params.limit]
+        last = requests[-1]
+        next_cursor = encode_cursor({"created_at": last.created_at.isoformat(), "id": last.id})
+
+    # Счётчики по статусам считаются с остальными фильтрами, но без фильтра по статусу
+    counts_query = apply_request_filters(
+        select(RequestModel.status, func.count()).group_by(RequestModel.status),
+        params.model_copy(update={"status": None}),
+    )
+    counts = dict((await session.execute(counts_query)).all())
+    status_counts = {status.value: counts.get(status, 0) for status in RequestStatusEnum}
+    return RequestPageSchema(items=requests, next_cursor=next_cursor, status_counts=status_counts)
+
+@router.get("/export")
+async def export_requests(params: Annotated[RequestExportQuerySchema, Query()],
+                          current_user: CurrentUser = Depends(get_current_user)):
+    filename = f"requests.{params.file_format.value}"
+    return StreamingResponse(
+        stream_requests(params, params.file_format),
+        media_type=MEDIA_TYPES[params.file_format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
 
 @router.get("/{request_id}", response_model=RequestResponseSchema)
 async def get_request(request_id: int, session: SessionDep):
@@ -76,7 +136,7 @@ async def get_request(request_id: int, session: SessionDep):
 async def update_request(request_id: int,
                          request_data: RequestCreateSchema,
                          session: SessionDep,
-                         current_user: UserModel = Depends(get_current_user)):
+                         current_user: CurrentUser = Depends(get_current_user)):
     query = (
         select(RequestModel)
         .options(
@@ -117,6 +177,7 @@ async def update_request(request_id: int,
             guardian = GuardianRequestModel(request_id=request.id)
             session.add(guardian)
 
+    await publish_changes(session, REQUESTS)
     await session.commit()
     await session.refresh(request)
 
@@ -131,11 +192,38 @@ async def update_request(request_id: int,
     return result.scalar_one()
 
 
+@router.patch("/bulk-status", response_model=RequestBulkStatusResultSchema)
+async def bulk_update_request_status(update_data: RequestBulkStatusSchema,
+                                     session: SessionDep,
+                                     current_user: CurrentUser = Depends(get_current_user)):
+    # Core UPDATE не вызывает обработчик RequestModel.status, поэтому closed_at
+    # выставляется здесь по тем же правилам
+    closed_at = datetime.today() if update_data.status == RequestStatusEnum.COMPLETED else None
+    query = (
+        update(RequestModel)
+        .where(RequestModel.status != update_data.status)
+        .values(status=update_data.status, closed_at=closed_at)
+        .returning(RequestModel.id, RequestModel.status, RequestModel.closed_at)
+        .execution_options(synchronize_session=False)
+    )
+    if update_data.ids is not None:
+        query = query.where(RequestModel.id == any_(literal(update_data.ids, ARRAY(Integer))))
+    else:
+        query = apply_request_filters(query, update_data.filters)
+
+    result = await session.execute(query)
+    rows = result.all()
+    if rows:
+        await publish_changes(session, REQUESTS)
+    await session.commit()
+    return RequestBulkStatusResultSchema(updated=len(rows), items=rows)
+
+
 @router.patch("/{request_id}", response_model=RequestResponseSchema)
 async def partial_update_request(request_id: int,
                                  update_data: RequestPatchSchema,
                                  session: SessionDep,
-                                 current_user: UserModel = Depends(get_current_user)):
+                                 current_user: CurrentUser = Depends(get_current_user)):
     query = (
         select(RequestModel)
         .options(
@@ -175,6 +263,7 @@ async def partial_update_request(request_id: int,
         for field, value in update_data.adoption_details.model_dump().items():
             setattr(request.adoption_request, field, value)
 
+    await publish_changes(session, REQUESTS)
     await session.commit()
     await session.refresh(request)
 
@@ -192,10 +281,11 @@ async def partial_update_request(request_id: int,
 @router.delete("/{request_id}")
 async def delete_request(request_id: int,
                          session: SessionDep,
-                         current_user: UserModel = Depends(get_current_user)):
+                         current_user: CurrentUser = Depends(get_current_user)):
     request = await session.get(RequestModel, request_id)
     if request is None:
         raise HTTPException(404, "Заявка не найдена")
     await session.delete(request)
+    await publish_changes(session, REQUESTS)
     await session.commit()
     return {"message": f"Заявка {request_id} успешно удалена"}
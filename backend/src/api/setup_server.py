@@ -1,11 +1,17 @@
 from fastapi import APIRouter
 from sqlalchemy import text
 from src.database import engine, Base
+from src.utils.analytics import ANALYTICS_VIEWS
 
 router = APIRouter(prefix="/setup_database", tags=["Database"])
 @router.post("/")
 async def setup_database():
     async with engine.begin() as conn:
+        # Материализованные представления зависят от таблиц и мешают drop_all
+        views = ", ".join(view.name for view in ANALYTICS_VIEWS)
+        await conn.execute(text(f"DROP MATERIALIZED VIEW IF EXISTS {views}"))
         await conn.run_sync(Base.metadata.drop_all)
+        # Триггеры удаляются вместе с таблицами, функции счётчиков — нет
+        await conn.execute(text("DROP FUNCTION IF EXISTS count_dogs(), count_new_requests()"))
         await conn.execute(text("DROP TABLE IF EXISTS alembic_version"))
         # await conn.run_sync(Base.metadata.create_all)
@@ -1,12 +1,12 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy import select, func
-from src.schemas.stats import RequestsAndDogsStatsResponse
+from typing import Annotated
+from fastapi import APIRouter, Depends, HTTPException, Query
+from src.schemas.stats import (RequestsAndDogsStatsResponse, AnalyticsQuerySchema,
+                               AnalyticsResponse)
 from src.api.dependencies import SessionDep
-from src.models.requests import RequestModel
-from src.models.dogs import DogModel
-from src.enums import RequestStatusEnum
 from src.utils.auth import get_current_user
-from src.utils.auth import UserModel
+from src.utils.auth import CurrentUser
+from src.utils.counters import DOGS_TOTAL, NEW_REQUESTS, read_counters
+from src.utils.analytics import load_analytics, refresh_analytics
 
 
 router = APIRouter(prefix="/stats", tags=["Stats"])
@@ -15,20 +15,23 @@ router = APIRouter(prefix="/stats", tags=["Stats"])
 @router.get("", response_model=RequestsAndDogsStatsResponse)
 async def get_count_new_requests_and_dogs(
         session: SessionDep,
-        current_user: UserModel = Depends(get_current_user)):
-    new_requests_result = await session.execute(
-        select(func.count(RequestModel.id)).where(
-            RequestStatusEnum.NEW == RequestModel.status
-        )
+        current_user: CurrentUser = Depends(get_current_user)):
+    counters = await read_counters(session, NEW_REQUESTS, DOGS_TOTAL)
+    return RequestsAndDogsStatsResponse(
+        new_requests_count=counters[NEW_REQUESTS],
+        total_dogs_count=counters[DOGS_TOTAL]
     )
-    new_requests_count = new_requests_result.scalar()
 
-    total_dogs_result = await session.execute(
-        select(func.count(DogModel.id))
-    )
-    total_dogs_count = total_dogs_result.scalar()
 
-    return RequestsAndDogsStatsResponse(
-        new_requests_count=new_requests_count,
-        total_dogs_count=total_dogs_count
-    )
+@router.get("/analytics", response_model=AnalyticsResponse)
+async def get_analytics(session: SessionDep,
+                        params: Annotated[AnalyticsQuerySchema, Query()],
+                        current_user: CurrentUser = Depends(get_current_user)):
+    return await load_analytics(session, params.date_from, params.date_to)
+
+
+@router.post("/analytics/refresh")
+async def refresh_analytics_views(current_user: CurrentUser = Depends(get_current_user)):
+    if not await refresh_analytics():
+        raise HTTPException(409, "Аналитика уже обновляется")
+    return {"message": "Аналитика обновлена"}
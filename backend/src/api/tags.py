@@ -1,10 +1,16 @@
-from fastapi import APIRouter, HTTPException, Depends
-from sqlalchemy import select
+from fastapi import APIRouter, HTTPException, Depends, Request, Response
+from sqlalchemy import select, func
 from src.api.dependencies import SessionDep
 from src.models.tags import TagModel
-from src.schemas.tags import TagAddSchema, TagResponseSchema
-from src.utils.auth import UserModel
+from src.models.tags_dogs import tag_dog
+from src.models.tags_news import tag_news
+from src.schemas.tags import TagAddSchema, TagResponseSchema, TagWithCountsSchema
+from src.utils.auth import CurrentUser
 from src.utils.auth import get_current_user
+from src.utils.etag import TAGS, DOGS, NEWS, conditional_get
+from src.utils.invalidation import publish_changes
+from src.utils.dog_filters import dog_facets_cache
+from src.utils.tag_registry import tag_registry
 
 
 router = APIRouter(prefix="/tags", tags=["Tags"])
@@ -13,25 +19,44 @@ router = APIRouter(prefix="/tags", tags=["Tags"])
 @router.post("", response_model=TagResponseSchema)
 async def add_tag(data: TagAddSchema,
                   session: SessionDep,
-                  current_user: UserModel = Depends(get_current_user)):
+                  current_user: CurrentUser = Depends(get_current_user)):
     new_tag = TagModel(name=data.name)
     session.add(new_tag)
+    await publish_changes(session, TAGS)
     await session.commit()
+    tag_registry.upsert(new_tag.id, new_tag.name)
     return new_tag
 
 
-@router.get("", response_model=list[TagResponseSchema])
-async def get_tags(session: SessionDep):
-    query = select(TagModel)
+@router.get("", response_model=list[TagWithCountsSchema], response_model_exclude_none=True)
+async def get_tags(session: SessionDep, request: Request, response: Response,
+                   with_counts: bool = False):
+    resources = (TAGS, DOGS, NEWS) if with_counts else (TAGS,)
+    not_modified = await conditional_get(session, request, response, *resources)
+    if not_modified:
+        return not_modified
+    if not with_counts:
+        return tag_registry.all()
+
+    dog_counts = (select(tag_dog.c.tag_id, func.count().label("count"))
+                  .group_by(tag_dog.c.tag_id).subquery())
+    news_counts = (select(tag_news.c.tag_id, func.count().label("count"))
+                   .group_by(tag_news.c.tag_id).subquery())
+    query = (
+        select(TagModel.id, TagModel.name,
+               func.coalesce(dog_counts.c.count, 0).label("dog_count"),
+               func.coalesce(news_counts.c.count, 0).label("news_count"))
+        .outerjoin(dog_counts, dog_counts.c.tag_id == TagModel.id)
+        .outerjoin(news_counts, news_counts.c.tag_id == TagModel.id)
+        .order_by(TagModel.id)
+    )
     result = await session.execute(query)
-    return result.scalars().all()
+    return [TagWithCountsSchema(**row) for row in result.mappings().all()]
 
 
 @router.get("/{tag_id}", response_model=TagResponseSchema)
-async def get_tag(tag_id: int, session: SessionDep):
-    query = select(TagModel).where(tag_id == TagModel.id)
-    result = await session.execute(query)
-    tag = result.scalar_one_or_none()
+async def get_tag(tag_id: int):
+    tag = tag_registry.get(tag_id)
     if tag is None:
         raise HTTPException(
             status_code=404,
@@ -44,7 +69,7 @@ async def get_tag(tag_id: int, session: SessionDep):
 async def put_tag(tag_id: int,
                   data: TagAddSchema,
                   session: SessionDep,
-                  current_user: UserModel = Depends(get_current_user)):
+                  current_user: CurrentUser = Depends(get_current_user)):
     query = select(TagModel).where(tag_id == TagModel.id)
     result = await session.execute(query)
     tag = result.scalar_one_or_none()
@@ -55,8 +80,10 @@ async def put_tag(tag_id: int,
         )
     tag.name = data.name
     session.add(tag)
+    await publish_changes(session, TAGS)
     await session.commit()
     await session.refresh(tag)
+    tag_registry.upsert(tag.id, tag.name)
     return tag
 
 
@@ -64,7 +91,7 @@ async def put_tag(tag_id: int,
 async def partial_update_tag(tag_id: int,
                              data: TagAddSchema,
                              session: SessionDep,
-                             current_user: UserModel = Depends(get_current_user)):
+                             current_user: CurrentUser = Depends(get_current_user)):
     query = select(TagModel).where(tag_id == TagModel.id)
     result = await session.execute(query)
     tag = result.scalar_one_or_none()
@@ -77,15 +104,17 @@ async def partial_update_tag(tag_id: int,
     for key, value in update_dict.items():
         setattr(tag, key, value)
     session.add(tag)
+    await publish_changes(session, TAGS)
     await session.commit()
     await session.refresh(tag)
+    tag_registry.upsert(tag.id, tag.name)
     return tag
 
 
 @router.delete("/{tag_id}", response_model=TagResponseSchema)
 async def delete_tag(tag_id: int,
                      session: SessionDep,
-                     current_user: UserModel = Depends(get_current_user)):
+                     current_user: CurrentUser = Depends(get_current_user)):
     query = select(TagModel).where(tag_id == TagModel.id)
     result = await session.execute(query)
     tag = result.scalar_one_or_none()
@@ -95,5 +124,8 @@ async def delete_tag(tag_id: int,
             detail="Информация о теге не найдена"
         )
     await session.delete(tag)
+    await publish_changes(session, TAGS)
     await session.commit()
+    tag_registry.discard(tag_id)
+    await dog_facets_cache.clear()
     return tag
@@ -0,0 +1,24 @@
+from fastapi import APIRouter, HTTPException, Depends, Request
+from src.schemas.uploads import PresignRequestSchema, PresignedUploadSchema
+from src.utils.auth import CurrentUser
+from src.utils.auth import get_current_user
+from src.utils.storage import UPLOAD_URL_TTL, LocalStorage, storage
+from src.utils.validate_image import MAX_UPLOAD_SIZE, new_upload_key, receive_upload
+
+
+router = APIRouter(prefix="/uploads", tags=["Uploads"])
+
+
+@router.post("/presign", response_model=PresignedUploadSchema)
+async def presign_upload(data: PresignRequestSchema,
+                         current_user: CurrentUser = Depends(get_current_user)):
+    key = new_upload_key(data.kind, data.content_type)
+    upload = storage.presign_upload(key, data.content_type, MAX_UPLOAD_SIZE, UPLOAD_URL_TTL)
+    return PresignedUploadSchema(key=key, expires_in=UPLOAD_URL_TTL, **upload)
+
+
+@router.put("/{key:path}", status_code=204)
+async def put_upload(key: str, expires: int, signature: str, request: Request):
+    if not isinstance(storage, LocalStorage) or not storage.verify_upload(key, expires, signature):
+        raise HTTPException(403, "Ссылка для загрузки недействительна или истекла")
+    await receive_upload(key, request.stream())
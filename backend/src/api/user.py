@@ -1,11 +1,15 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
+from sqlalchemy.orm import selectinload
 from src.database import get_session
 from src.models.user import UserModel
 from src.schemas.user import UserAddSchema, UserGetSchema
 from src.utils.hashing import get_password_hash
-from src.utils.auth import get_current_user
+from src.utils.auth import CurrentUser, get_current_user, principal_cache
+from src.utils.etag import USERS, NEWS
+from src.utils.image_store import release_image
+from src.utils.invalidation import publish_changes
 
 router = APIRouter(prefix="/users", tags=["Users"])
 
@@ -14,7 +18,7 @@ router = APIRouter(prefix="/users", tags=["Users"])
 async def add_user(
     user_data: UserAddSchema,
     session: AsyncSession = Depends(get_session),
-    current_user: UserModel = Depends(get_current_user)
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     """Создать нового пользователя"""
     existing_username = await session.execute(
@@ -29,7 +33,7 @@ async def add_user(
     if existing_email.scalar_one_or_none():
         raise HTTPException(status_code=400, detail="Пользователь с таким email уже существует")
 
-    hashed_password = get_password_hash(user_data.password)
+    hashed_password = await get_password_hash(user_data.password)
     new_user = UserModel(
         username=user_data.username,
         password=hashed_password,
@@ -64,7 +68,7 @@ async def update_user(
     user_id: int,
     user_data: UserAddSchema,
     session: AsyncSession = Depends(get_session),
-    current_user: UserModel = Depends(get_current_user)
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     """Обновить пользователя"""
     query = select(UserModel).where(UserModel.id == user_id)
@@ -88,11 +92,13 @@ async def update_user(
             raise HTTPException(status_code=400, detail="Email уже используется")
 
     user.username = user_data.username
-    user.password = get_password_hash(user_data.password)
+    user.password = await get_password_hash(user_data.password)
     user.email = user_data.email
     user.role = user_data.role
 
+    await publish_changes(session, USERS)
     await session.commit()
+    principal_cache.invalidate_user(user_id)
     await session.refresh(user)
     return user
 
@@ -100,13 +106,23 @@ async def update_user(
 @router.delete("/{user_id}")
 async def delete_user(user_id: int,
                       session: AsyncSession = Depends(get_session),
-                      current_user: UserModel = Depends(get_current_user)):
-    query = select(UserModel).where(UserModel.id == user_id)
+                      current_user: CurrentUser = Depends(get_current_user)):
+    query = (select(UserModel)
+             .options(selectinload(UserModel.news))
+             .where(UserModel.id == user_id))
     result = await session.execute(query)
     user = result.scalar_one_or_none()
     if not user:
         raise HTTPException(status_code=404, detail="Пользователь не найден")
 
+    # Новости пользователя удаляются каскадом, поэтому их изображения
+    # освобождаются здесь так же, как в delete_news
+    for news in user.news:
+        await release_image(session, news.image_url, news.image_variants)
+
     await session.delete(user)
+    resources = (USERS, NEWS) if user.news else (USERS,)
+    await publish_changes(session, *resources)
     await session.commit()
+    principal_cache.invalidate_user(user_id)
     return {"message": "Пользователь удален"}
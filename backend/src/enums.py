@@ -43,3 +43,29 @@ class HousingAreaEnum(Enum):
 class RequestTypeEnum(Enum):
     ADOPTION_REQUEST = "Усыновление"
     GUARDIAN_REQUEST = "Опека"
+
+
+class RequestSortEnum(Enum):
+    NEWEST = "newest"
+    OLDEST = "oldest"
+
+
+class TagMatchEnum(Enum):
+    ANY = "any"
+    ALL = "all"
+
+
+class DataFormatEnum(Enum):
+    CSV = "csv"
+    NDJSON = "ndjson"
+
+
+class UploadKindEnum(Enum):
+    DOGS = "dogs"
+    NEWS = "news"
+
+
+class ImageFormatEnum(Enum):
+    JPEG = "jpeg"
+    PNG = "png"
+    WEBP = "webp"
@@ -1,15 +1,47 @@
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
-from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
 from src.utils.init_db import create_admin_user
+from src.utils.dog_pool import dog_image_pool
+from src.utils.tag_registry import tag_registry
+from src.utils.image_variants import shutdown_image_executor
+from src.utils.hashing import shutdown_hashing_executor
+from src.utils.image_resize import image_resizer
+from src.utils.static_files import ImageStaticFiles
+from src.utils.image_gc import IMAGE_GC_INTERVAL, run_image_gc
+from src.utils.analytics import ANALYTICS_REFRESH_INTERVAL, refresh_analytics
+from src.utils.counters import COUNTER_RECOUNT_INTERVAL, run_counter_recount
+from src.utils.periodic import start_periodic, stop_tasks
+from src.utils.storage import file_janitor
+from src.utils.invalidation import invalidation_listener
 from src.api import main_router
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     await create_admin_user()
+    await tag_registry.load()
+    dog_image_pool.warm()
+    file_janitor.start()
+    invalidation_listener.start()
+    await image_resizer.cache.load()
+    background_tasks = []
+    if IMAGE_GC_INTERVAL > 0:
+        background_tasks.append(start_periodic(IMAGE_GC_INTERVAL, run_image_gc, "image_gc"))
+    if COUNTER_RECOUNT_INTERVAL > 0:
+        background_tasks.append(
+            start_periodic(COUNTER_RECOUNT_INTERVAL, run_counter_recount, "counter_recount")
+        )
+    if ANALYTICS_REFRESH_INTERVAL > 0:
+        background_tasks.append(
+            start_periodic(ANALYTICS_REFRESH_INTERVAL, refresh_analytics, "analytics_refresh")
+        )
     yield
+    await stop_tasks(background_tasks)
+    await invalidation_listener.stop()
+    await file_janitor.stop()
+    shutdown_image_executor()
+    shutdown_hashing_executor()
 
 app = FastAPI(lifespan=lifespan)
 
@@ -21,4 +53,4 @@ app.add_middleware(
 )
 
 app.include_router(main_router)
-app.mount("/static", StaticFiles(directory="static"), name="static")
+app.mount("/static", ImageStaticFiles(directory="static"), name="static")
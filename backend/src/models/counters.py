@@ -0,0 +1,11 @@
+from sqlalchemy import String, BigInteger
+from sqlalchemy.orm import Mapped, mapped_column
+from src.database import Base
+
+
+class CounterModel(Base):
+    """Счётчики, которые поддерживаются триггерами на таблицах dog и request."""
+    __tablename__ = 'counter'
+
+    name: Mapped[str] = mapped_column(String(32), primary_key=True)
+    value: Mapped[int] = mapped_column(BigInteger, default=0)
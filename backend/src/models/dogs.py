@@ -4,12 +4,28 @@ from datetime import date
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy import String
 from sqlalchemy import Text
+from sqlalchemy import Index
+from sqlalchemy import Computed
+from sqlalchemy.dialects.postgresql import TSVECTOR, JSONB
 from src.models.tags_dogs import tag_dog
 from src.database import Base
 from src.enums import GenderEnum
 
+DOG_SEARCH_VECTOR = (
+    "setweight(to_tsvector('russian', coalesce(name, '')), 'A') || "
+    "setweight(to_tsvector('russian', coalesce(breed, '')), 'B') || "
+    "setweight(to_tsvector('russian', coalesce(description, '')), 'C')"
+)
+
 class DogModel(Base):
     __tablename__ = 'dog'
+    __table_args__ = (
+        Index('ix_dog_breed_id', 'breed', 'id'),
+        Index('ix_dog_gender_age_id', 'gender', 'age', 'id'),
+        Index('ix_dog_intake_date_id', 'intake_date', 'id'),
+        Index('ix_dog_veterinary_passport_id', 'veterinary_passport', 'id'),
+        Index('ix_dog_search_vector', 'search_vector', postgresql_using='gin'),
+    )
 
     id : Mapped[int] = mapped_column(primary_key=True)
     name : Mapped[str]
@@ -20,10 +36,18 @@ class DogModel(Base):
     veterinary_passport: Mapped[bool]
     gender: Mapped[GenderEnum]
     image_url: Mapped[str | None] = mapped_column(String(255), nullable=True)
+    image_variants: Mapped[dict | None] = mapped_column(JSONB, nullable=True)
+    search_vector: Mapped[str] = mapped_column(
+        TSVECTOR,
+        Computed(DOG_SEARCH_VECTOR, persisted=True),
+        nullable=True,
+        deferred=True,
+    )
 
     tags: Mapped[List["TagModel"]] = relationship(
         "TagModel",
         secondary=tag_dog,
         back_populates="dogs",
+        lazy="raise",
         passive_deletes=True
     )
@@ -0,0 +1,18 @@
+from datetime import datetime
+from sqlalchemy import String, Index
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.dialects.postgresql import JSONB
+from src.database import Base
+
+
+class ImageRefModel(Base):
+    __tablename__ = 'image_ref'
+    __table_args__ = (
+        Index('ix_image_ref_sha256', 'sha256'),
+    )
+
+    url: Mapped[str] = mapped_column(String(255), primary_key=True)
+    sha256: Mapped[str | None] = mapped_column(String(64), nullable=True)
+    ref_count: Mapped[int] = mapped_column(default=0)
+    image_variants: Mapped[dict | None] = mapped_column(JSONB, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(default=datetime.now)
@@ -2,6 +2,7 @@ from datetime import datetime
 from typing import TYPE_CHECKING, List
 from sqlalchemy import String, Text, DateTime, ForeignKey
 from sqlalchemy.orm import relationship, Mapped, mapped_column
+from sqlalchemy.dialects.postgresql import JSONB
 from src.database import Base
 from src.models.tags_news import tag_news
 
@@ -19,11 +20,13 @@ class NewsModel(Base):
     author_id: Mapped[int] = mapped_column(ForeignKey('user.id'), nullable=False)
     preview: Mapped[str] = mapped_column(String(500), nullable=True)
     image_url: Mapped[str | None] = mapped_column(String(255), nullable=True)
+    image_variants: Mapped[dict | None] = mapped_column(JSONB, nullable=True)
 
     author: Mapped["UserModel"] = relationship("UserModel", back_populates="news")
     tags: Mapped[List["TagModel"]] = relationship(
         "TagModel",
         secondary=tag_news,
         back_populates="news",
-        lazy="selectin",
+        lazy="raise",
+        passive_deletes=True,
     )
@@ -3,6 +3,8 @@ from datetime import datetime
 from typing import Optional
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy import ForeignKey
+from sqlalchemy import event
+from sqlalchemy import Index
 from src.database import Base
 from src.enums import (RequestStatusEnum, FamilyMemberCountEnum,
                        PetExperienceEnum, AdoptionPurposeEnum,
@@ -11,6 +13,12 @@ from src.enums import (RequestStatusEnum, FamilyMemberCountEnum,
 
 class RequestModel(Base):
     __tablename__ = 'request'
+    __table_args__ = (
+        Index('ix_request_created_at_id', 'created_at', 'id'),
+        Index('ix_request_status_created_at_id', 'status', 'created_at', 'id'),
+        Index('ix_request_type_created_at_id', 'type', 'created_at', 'id'),
+        Index('ix_request_dog_id_created_at_id', 'dog_id', 'created_at', 'id'),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     dog_id: Mapped[int] = mapped_column(nullable=False)
@@ -30,6 +38,17 @@ class RequestModel(Base):
     )
 
 
+@event.listens_for(RequestModel.status, "set", active_history=True)
+def _track_closed_at(target: RequestModel, value, oldvalue, initiator):
+    """closed_at ставится при переходе в COMPLETED и сбрасывается при возврате из него."""
+    if value == oldvalue:
+        return
+    if value == RequestStatusEnum.COMPLETED:
+        target.closed_at = datetime.today()
+    elif oldvalue == RequestStatusEnum.COMPLETED:
+        target.closed_at = None
+
+
 class AdoptionRequestModel(Base):
     __tablename__ = 'adoption_request'
 
@@ -18,12 +18,14 @@ class TagModel(Base):
         "NewsModel",
         secondary=tag_news,
         back_populates="tags",
-        lazy="selectin"
+        lazy="raise",
+        passive_deletes=True
     )
 
     dogs: Mapped[List["DogModel"]] = relationship(
         "DogModel",
         secondary=tag_dog,
         back_populates="tags",
+        lazy="raise",
         passive_deletes=True
     )
@@ -1,4 +1,4 @@
-from sqlalchemy import Table, Column, Integer, ForeignKey
+from sqlalchemy import Table, Column, Integer, ForeignKey, Index
 from src.database import Base
 
 tag_dog = Table(
@@ -6,4 +6,5 @@ tag_dog = Table(
     Base.metadata,
     Column('dog_id', Integer, ForeignKey('dog.id', ondelete="CASCADE"), primary_key=True),
     Column('tag_id', Integer, ForeignKey('tag.id', ondelete="CASCADE"), primary_key=True),
+    Index('ix_tag_dog_tag_id_dog_id', 'tag_id', 'dog_id'),
 )
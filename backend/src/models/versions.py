@@ -0,0 +1,10 @@
+from sqlalchemy import String, BigInteger
+from sqlalchemy.orm import Mapped, mapped_column
+from src.database import Base
+
+
+class ResourceVersionModel(Base):
+    __tablename__ = 'resource_version'
+
+    name: Mapped[str] = mapped_column(String(32), primary_key=True)
+    version: Mapped[int] = mapped_column(BigInteger, default=0)
@@ -7,3 +7,12 @@ class UserLoginSchema(BaseModel):
 class Token(BaseModel):
     access_token: str
     token_type: str
+
+class LoginMetricsSchema(BaseModel):
+    attempts: int
+    succeeded: int
+    failed: int
+    unknown_username: int
+    throttled_ip: int
+    throttled_username: int
+    average_verify_ms: float
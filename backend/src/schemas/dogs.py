@@ -1,8 +1,8 @@
 from __future__ import annotations
 from datetime import date
 from typing import List
-from pydantic import BaseModel
-from src.enums import GenderEnum
+from pydantic import BaseModel, Field, field_validator
+from src.enums import GenderEnum, TagMatchEnum
 from src.schemas.tags import TagResponseSchema
 
 class DogAddSchema(BaseModel):
@@ -24,6 +24,7 @@ class DogResponseSchema(BaseModel):
     veterinary_passport: bool
     gender: GenderEnum
     image_url: str | None = None
+    image_variants: dict[str, str] | None = None
     tags: List[TagResponseSchema]
 
     class Config:
@@ -32,6 +33,79 @@ class DogResponseSchema(BaseModel):
 class DogImagesRandomSchema(BaseModel):
     id: int
     image_url: str
+    image_variants: dict[str, str] | None = None
 
     class Config:
         from_attributes = True
+
+
+class DogFilterSchema(BaseModel):
+    breed: str | None = None
+    gender: GenderEnum | None = None
+    age_min: int | None = Field(None, ge=0)
+    age_max: int | None = Field(None, ge=0)
+    intake_from: date | None = None
+    intake_to: date | None = None
+    veterinary_passport: bool | None = None
+    tag_ids: List[int] = []
+    tag_mode: TagMatchEnum = TagMatchEnum.ANY
+
+class DogListQuerySchema(DogFilterSchema):
+    limit: int = Field(20, ge=1, le=100)
+    cursor: str | None = None
+
+class DogPageSchema(BaseModel):
+    items: List[DogResponseSchema]
+    next_cursor: str | None = None
+
+class DogSearchQuerySchema(BaseModel):
+    q: str = Field(..., min_length=1, max_length=200)
+    limit: int = Field(20, ge=1, le=100)
+    offset: int = Field(0, ge=0)
+
+class DogSearchResultSchema(DogResponseSchema):
+    rank: float
+    headline: str
+
+class DogSearchPageSchema(BaseModel):
+    items: List[DogSearchResultSchema]
+    next_offset: int | None = None
+
+class FacetCountSchema(BaseModel):
+    value: str
+    count: int
+
+class TagFacetSchema(BaseModel):
+    id: int
+    count: int
+
+class DogFacetsSchema(BaseModel):
+    total: int
+    tags: List[TagFacetSchema]
+    breeds: List[FacetCountSchema]
+    genders: List[FacetCountSchema]
+    age_buckets: List[FacetCountSchema]
+
+class DogImportRowSchema(DogAddSchema):
+    # Длины совпадают с колонками dog: COPY не обрезает значения, а отклоняет порцию
+    breed: str = Field(max_length=100)
+    image_url: str | None = Field(None, max_length=255)
+    tags: List[str] = []
+
+    @field_validator("tags", mode="before")
+    @classmethod
+    def split_tags(cls, v):
+        if v is None:
+            return []
+        if isinstance(v, str):
+            return [item.strip() for item in v.split(",") if item.strip()]
+        return [str(item).strip() for item in v]
+
+class DogImportErrorSchema(BaseModel):
+    row: int
+    detail: str
+
+class DogImportReportSchema(BaseModel):
+    imported: int
+    failed: int
+    errors: List[DogImportErrorSchema]
@@ -0,0 +1,18 @@
+from typing import Optional
+from pydantic import BaseModel, field_validator
+from src.enums import ImageFormatEnum
+from src.utils.image_resize import RESIZE_DIMENSIONS
+
+
+class ImageResizeQuerySchema(BaseModel):
+    w: Optional[int] = None
+    h: Optional[int] = None
+    fmt: Optional[ImageFormatEnum] = None
+
+    @field_validator("w", "h")
+    @classmethod
+    def validate_dimension(cls, v):
+        if v is not None and v not in RESIZE_DIMENSIONS:
+            allowed = ", ".join(map(str, sorted(RESIZE_DIMENSIONS)))
+            raise ValueError(f"Допустимые размеры: {allowed}")
+        return v
@@ -20,6 +20,7 @@ class NewsGetSchema(BaseModel):
     tags: List[TagResponseSchema]
     preview: str | None = None
     image_url: str | None = None
+    image_variants: dict[str, str] | None = None
 
     model_config = ConfigDict(from_attributes=True)
 
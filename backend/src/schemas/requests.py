@@ -1,10 +1,11 @@
 from __future__ import annotations
 from datetime import datetime
 from typing import Optional
-from pydantic import BaseModel, ConfigDict, field_validator, model_validator
+from pydantic import BaseModel, ConfigDict, Field, field_validator, model_validator
 from src.enums import (RequestStatusEnum, FamilyMemberCountEnum,
                        PetExperienceEnum, AdoptionPurposeEnum,
-                       HousingTypeEnum, HousingAreaEnum, RequestTypeEnum)
+                       HousingTypeEnum, HousingAreaEnum, RequestTypeEnum,
+                       DataFormatEnum, RequestSortEnum)
 
 
 class RequestBaseSchema(BaseModel):
@@ -116,3 +117,56 @@ class RequestPatchSchema(BaseModel):
         return self
 
     model_config = ConfigDict(extra="forbid")
+
+
+class RequestFilterSchema(BaseModel):
+    status: Optional[RequestStatusEnum] = None
+    type: Optional[RequestTypeEnum] = None
+    dog_id: Optional[int] = None
+    created_from: Optional[datetime] = None
+    created_to: Optional[datetime] = None
+
+
+class RequestExportQuerySchema(RequestFilterSchema):
+    file_format: DataFormatEnum = DataFormatEnum.CSV
+
+
+class RequestListQuerySchema(RequestFilterSchema):
+    sort: RequestSortEnum = RequestSortEnum.NEWEST
+    limit: int = Field(20, ge=1, le=100)
+    cursor: Optional[str] = None
+
+
+class RequestPageSchema(BaseModel):
+    items: list[RequestResponseSchema]
+    next_cursor: Optional[str] = None
+    status_counts: dict[str, int]
+
+
+class RequestBulkStatusSchema(BaseModel):
+    status: RequestStatusEnum
+    ids: Optional[list[int]] = Field(None, min_length=1, max_length=1000)
+    filters: Optional[RequestFilterSchema] = None
+
+    @model_validator(mode='after')
+    def validate_target(self) -> 'RequestBulkStatusSchema':
+        if (self.ids is None) == (self.filters is None):
+            raise ValueError("Необходимо указать либо ids, либо filters")
+        if self.filters is not None and not self.filters.model_dump(exclude_none=True):
+            raise ValueError("Укажите хотя бы один фильтр")
+        return self
+
+    model_config = ConfigDict(extra="forbid")
+
+
+class RequestStatusChangeSchema(BaseModel):
+    id: int
+    status: RequestStatusEnum
+    closed_at: Optional[datetime] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class RequestBulkStatusResultSchema(BaseModel):
+    updated: int
+    items: list[RequestStatusChangeSchema]
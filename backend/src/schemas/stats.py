@@ -1,5 +1,43 @@
+from datetime import date
+from typing import Optional
 from pydantic import BaseModel
+from src.enums import RequestStatusEnum, RequestTypeEnum
 
 class RequestsAndDogsStatsResponse(BaseModel):
     new_requests_count: int
     total_dogs_count: int
+
+
+class AnalyticsQuerySchema(BaseModel):
+    date_from: Optional[date] = None
+    date_to: Optional[date] = None
+
+
+class RequestStatusDaySchema(BaseModel):
+    day: date
+    status: RequestStatusEnum
+    request_count: int
+    running_total: int
+
+
+class RequestCloseTimeSchema(BaseModel):
+    month: date
+    type: RequestTypeEnum
+    closed_count: int
+    # None, если длительность ни одной заявки за месяц неизвестна
+    avg_hours: Optional[float] = None
+    median_hours: Optional[float] = None
+    rolling_avg_hours: Optional[float] = None
+
+
+class DogIntakeMonthSchema(BaseModel):
+    month: date
+    intake_count: int
+    cumulative_count: int
+    change: Optional[int] = None
+
+
+class AnalyticsResponse(BaseModel):
+    requests_by_day: list[RequestStatusDaySchema]
+    time_to_close: list[RequestCloseTimeSchema]
+    intake_by_month: list[DogIntakeMonthSchema]
@@ -9,3 +9,7 @@ class TagResponseSchema(BaseModel):
     name: str
 
     model_config = ConfigDict(from_attributes=True)
+
+class TagWithCountsSchema(TagResponseSchema):
+    dog_count: int | None = None
+    news_count: int | None = None
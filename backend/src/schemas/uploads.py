@@ -0,0 +1,16 @@
+from pydantic import BaseModel
+from src.enums import UploadKindEnum
+
+
+class PresignRequestSchema(BaseModel):
+    kind: UploadKindEnum
+    content_type: str
+
+
+class PresignedUploadSchema(BaseModel):
+    key: str
+    url: str
+    method: str
+    fields: dict[str, str]
+    headers: dict[str, str]
+    expires_in: int
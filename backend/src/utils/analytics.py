@@ -0,0 +1,84 @@
+import os
+from datetime import date
+from typing import Optional
+from sqlalchemy import select, text, table, column, Date, BigInteger, Float, Enum
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.database import new_session
+from src.enums import RequestStatusEnum, RequestTypeEnum
+
+ANALYTICS_REFRESH_INTERVAL = int(os.getenv("ANALYTICS_REFRESH_INTERVAL", "900"))
+# Ключ advisory-блокировки: обновлять представления одновременно может только один воркер
+ANALYTICS_REFRESH_LOCK = 0x616E616C
+
+# Материализованные представления создаются миграцией b5d0f3a8c917
+request_status_daily = table(
+    "request_status_daily",
+    column("day", Date),
+    column("status", Enum(RequestStatusEnum)),
+    column("request_count", BigInteger),
+    column("running_total", BigInteger),
+)
+request_close_time = table(
+    "request_close_time",
+    column("month", Date),
+    column("type", Enum(RequestTypeEnum)),
+    column("closed_count", BigInteger),
+    column("avg_hours", Float),
+    column("median_hours", Float),
+    column("rolling_avg_hours", Float),
+)
+dog_intake_monthly = table(
+    "dog_intake_monthly",
+    column("month", Date),
+    column("intake_count", BigInteger),
+    column("cumulative_count", BigInteger),
+    column("change", BigInteger),
+)
+ANALYTICS_VIEWS = (request_status_daily, request_close_time, dog_intake_monthly)
+
+
+async def refresh_analytics() -> bool:
+    """Обновляет представления, не блокируя чтение из них.
+
+    Возвращает False, если обновление уже выполняет другой воркер.
+    """
+    async with new_session() as session:
+        locked = (await session.execute(
+            text("SELECT pg_try_advisory_xact_lock(:key)"), {"key": ANALYTICS_REFRESH_LOCK}
+        )).scalar_one()
+        if not locked:
+            return False
+        for view in ANALYTICS_VIEWS:
+            await session.execute(text(f"REFRESH MATERIALIZED VIEW CONCURRENTLY {view.name}"))
+        await session.commit()
+    return True
+
+
+def _between(query, value_column, date_from: Optional[date], date_to: Optional[date]):
+    if date_from is not None:
+        query = query.where(value_column >= date_from)
+    if date_to is not None:
+        query = query.where(value_column <= date_to)
+    return query
+
+
+async def load_analytics(session: AsyncSession,
+                         date_from: Optional[date] = None,
+                         date_to: Optional[date] = None) -> dict[str, list[dict]]:
+    daily, close_time, intake = request_status_daily.c, request_close_time.c, dog_intake_monthly.c
+    queries = {
+        "requests_by_day": _between(
+            select(request_status_daily).order_by(daily.day, daily.status),
+            daily.day, date_from, date_to,
+        ),
+        "time_to_close": _between(
+            select(request_close_time).order_by(close_time.month, close_time.type),
+            close_time.month, date_from, date_to,
+        ),
+        "intake_by_month": _between(
+            select(dog_intake_monthly).order_by(intake.month),
+            intake.month, date_from, date_to,
+        ),
+    }
+    return {name: [dict(row) for row in (await session.execute(query)).mappings()]
+            for name, query in queries.items()}
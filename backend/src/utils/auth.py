@@ -1,12 +1,18 @@
 import os
+import time
+from dataclasses import dataclass
 from datetime import datetime, timedelta
 from pydantic import BaseModel
 from jose import JWTError, jwt
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from src.database import get_session
 from src.models.user import UserModel
+from src.utils.cache import LRUCache
+from src.utils.etag import USERS
+from src.utils.invalidation import on_change
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
@@ -18,6 +24,57 @@ if not SECRET_KEY:
     raise ValueError("Переменная окружения JWT_SECRET_KEY не задана!")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
+PRINCIPAL_CACHE_SIZE = 1024
+PRINCIPAL_CACHE_TTL = int(os.getenv("PRINCIPAL_CACHE_TTL", "60"))
+
+
+@dataclass(frozen=True, slots=True)
+class CurrentUser:
+    """Пользователь текущего запроса без ORM-состояния и хеша пароля."""
+    id: int
+    username: str
+    role: str
+
+
+class PrincipalCache:
+    """Кэш проверенных токенов: токен -> CurrentUser.
+
+    Запись живёт не дольше PRINCIPAL_CACHE_TTL и срока действия токена.
+    При изменении или удалении пользователя его поколение увеличивается,
+    и все закэшированные для него записи перестают совпадать.
+    """
+
+    def __init__(self, maxsize: int = PRINCIPAL_CACHE_SIZE, ttl: float = PRINCIPAL_CACHE_TTL):
+        self.ttl = ttl
+        self._entries = LRUCache(maxsize=maxsize, ttl=ttl)
+        self._generations: dict[int, int] = {}
+
+    def get(self, token: str) -> CurrentUser | None:
+        entry = self._entries.get(token)
+        if entry is None:
+            return None
+        user, generation = entry
+        if self._generations.get(user.id, 0) != generation:
+            self._entries.delete(token)
+            return None
+        return user
+
+    def set(self, token: str, user: CurrentUser, expires_at: float | None = None):
+        ttl = self.ttl
+        if expires_at is not None:
+            ttl = min(ttl, expires_at - time.time())
+        if ttl > 0:
+            self._entries.set(token, (user, self._generations.get(user.id, 0)), ttl)
+
+    def invalidate_user(self, user_id: int):
+        self._generations[user_id] = self._generations.get(user_id, 0) + 1
+
+    def clear(self):
+        self._entries.clear()
+
+
+principal_cache = PrincipalCache()
+on_change(USERS, principal_cache.clear)
 
 def create_access_token(data: dict):
     to_encode = data.copy()
@@ -29,7 +86,11 @@ def create_access_token(data: dict):
 async def get_current_user(
     token: str = Depends(oauth2_scheme),
     session: AsyncSession = Depends(get_session)
-) -> UserModel:
+) -> CurrentUser:
+    user = principal_cache.get(token)
+    if user is not None:
+        return user
+
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Не удалось проверить учетные данные",
@@ -44,7 +105,13 @@ async def get_current_user(
     except JWTError as exc:
         raise credentials_exception from exc
 
-    user = await session.get(UserModel, int(token_data.user_id))
-    if user is None:
+    result = await session.execute(
+        select(UserModel.id, UserModel.username, UserModel.role)
+        .where(UserModel.id == int(token_data.user_id))
+    )
+    row = result.one_or_none()
+    if row is None:
         raise credentials_exception
+    user = CurrentUser(*row)
+    principal_cache.set(token, user, payload.get("exp"))
     return user
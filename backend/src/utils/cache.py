@@ -0,0 +1,130 @@
+import json
+import os
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Hashable
+
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memory")
+REDIS_URL = os.getenv("REDIS_URL") or "redis://localhost:6379/0"
+REDIS_SCAN_COUNT = 500
+
+
+class LRUCache:
+    """Ограниченный по размеру in-process кэш с вытеснением давно не использованных
+    ключей и необязательным временем жизни записей."""
+
+    def __init__(self, maxsize: int = 1024, ttl: float | None = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict[Hashable, tuple[float | None, Any]] = OrderedDict()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._data.get(key)
+        if entry is None:
+            return default
+        expires_at, value = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._data[key]
+            return default
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: float | None = None):
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+        self._data[key] = (expires_at, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def delete(self, key: Hashable):
+        self._data.pop(key, None)
+
+    def clear(self):
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class CacheBackend(ABC):
+    """Асинхронный кэш с пространством имён. Значения должны сериализоваться в JSON,
+    чтобы любой бэкенд мог их хранить."""
+
+    @abstractmethod
+    async def get(self, key: str) -> Any:
+        ...
+
+    @abstractmethod
+    async def set(self, key: str, value: Any, ttl: float | None = None):
+        ...
+
+    @abstractmethod
+    async def delete(self, key: str):
+        ...
+
+    @abstractmethod
+    async def clear(self):
+        ...
+
+
+class MemoryCache(CacheBackend):
+    """Кэш в памяти процесса: LRU с необязательным TTL."""
+
+    def __init__(self, maxsize: int = 1024, ttl: float | None = None):
+        self._lru = LRUCache(maxsize=maxsize, ttl=ttl)
+
+    async def get(self, key: str) -> Any:
+        return self._lru.get(key)
+
+    async def set(self, key: str, value: Any, ttl: float | None = None):
+        self._lru.set(key, value, ttl)
+
+    async def delete(self, key: str):
+        self._lru.delete(key)
+
+    async def clear(self):
+        self._lru.clear()
+
+
+class RedisCache(CacheBackend):
+    """Общий для всех воркеров кэш в Redis-совместимом сервере. Требует пакет redis."""
+
+    def __init__(self, namespace: str, ttl: float | None = None, url: str = REDIS_URL):
+        try:
+            from redis import asyncio as redis_asyncio  # pylint: disable=import-outside-toplevel
+        except ImportError as exc:
+            raise RuntimeError("Для CACHE_BACKEND=redis требуется пакет redis") from exc
+        self.client = redis_asyncio.from_url(url)
+        self.prefix = f"{namespace}:"
+        self.ttl = ttl
+
+    async def get(self, key: str) -> Any:
+        raw = await self.client.get(self.prefix + key)
+        return None if raw is None else json.loads(raw)
+
+    async def set(self, key: str, value: Any, ttl: float | None = None):
+        ttl = self.ttl if ttl is None else ttl
+        expire = int(ttl) if ttl is not None else None
+        await self.client.set(self.prefix + key, json.dumps(value), ex=expire)
+
+    async def delete(self, key: str):
+        await self.client.delete(self.prefix + key)
+
+    async def clear(self):
+        batch = []
+        async for key in self.client.scan_iter(match=f"{self.prefix}*", count=REDIS_SCAN_COUNT):
+            batch.append(key)
+            if len(batch) >= REDIS_SCAN_COUNT:
+                await self.client.unlink(*batch)
+                batch = []
+        if batch:
+            await self.client.unlink(*batch)
+
+
+def create_cache(namespace: str, maxsize: int = 1024, ttl: float | None = None) -> CacheBackend:
+    """Кэш выбранного в CACHE_BACKEND типа: memory (по умолчанию) или redis."""
+    if CACHE_BACKEND == "redis":
+        return RedisCache(namespace, ttl=ttl)
+    return MemoryCache(maxsize=maxsize, ttl=ttl)
@@ -0,0 +1,60 @@
+import os
+from sqlalchemy import select, func
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.database import new_session
+from src.enums import RequestStatusEnum
+from src.models.counters import CounterModel
+from src.models.dogs import DogModel
+from src.models.requests import RequestModel
+
+DOGS_TOTAL = "dogs_total"
+NEW_REQUESTS = "new_requests"
+COUNTER_RECOUNT_INTERVAL = int(os.getenv("COUNTER_RECOUNT_INTERVAL", "3600"))
+
+COUNT_QUERIES = {
+    DOGS_TOTAL: select(func.count()).select_from(DogModel),
+    NEW_REQUESTS: select(func.count()).select_from(RequestModel).where(
+        RequestModel.status == RequestStatusEnum.NEW
+    ),
+}
+
+
+async def read_counters(session: AsyncSession, *names: str) -> dict[str, int]:
+    result = await session.execute(
+        select(CounterModel.name, CounterModel.value).where(CounterModel.name.in_(names))
+    )
+    values = dict(result.all())
+    return {name: values.get(name, 0) for name in names}
+
+
+async def recount_counters() -> dict[str, int]:
+    """Пересчитывает счётчики по таблицам и возвращает исправленные расхождения.
+
+    Строки счётчиков блокируются до подсчёта: транзакции, уже изменившие
+    счётчик, к этому моменту зафиксированы и попадают в подсчёт, а остальные
+    прибавят свою разницу после нас.
+    """
+    async with new_session() as session:
+        stored = dict((await session.execute(
+            select(CounterModel.name, CounterModel.value)
+            .where(CounterModel.name.in_(COUNT_QUERIES))
+            .with_for_update()
+        )).all())
+        drift = {}
+        for name, query in COUNT_QUERIES.items():
+            actual = (await session.execute(query)).scalar_one()
+            if stored.get(name) != actual:
+                drift[name] = actual - stored.get(name, 0)
+                stmt = insert(CounterModel).values(name=name, value=actual)
+                await session.execute(stmt.on_conflict_do_update(
+                    index_elements=[CounterModel.name], set_={"value": actual}
+                ))
+        await session.commit()
+    return drift
+
+
+async def run_counter_recount():
+    drift = await recount_counters()
+    if drift:
+        print(f"Счётчики расходились с таблицами и были исправлены: {drift}")
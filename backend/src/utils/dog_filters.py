@@ -0,0 +1,62 @@
+from sqlalchemy import Select, select, func, case
+from src.enums import TagMatchEnum
+from src.models.dogs import DogModel
+from src.models.tags_dogs import tag_dog
+from src.schemas.dogs import DogFilterSchema
+from src.utils.cache import create_cache
+from src.utils.etag import DOGS, TAGS
+from src.utils.invalidation import on_change
+
+FACETS_CACHE_TTL = 600
+
+dog_facets_cache = create_cache("dog_facets", maxsize=256, ttl=FACETS_CACHE_TTL)
+on_change(DOGS, dog_facets_cache.clear)
+on_change(TAGS, dog_facets_cache.clear)
+
+AGE_BUCKETS = (
+    ("0-1", 0, 1),
+    ("2-3", 2, 3),
+    ("4-7", 4, 7),
+    ("8+", 8, None),
+)
+
+
+def age_bucket_expression():
+    return case(
+        *[(DogModel.age <= upper, label) for label, _, upper in AGE_BUCKETS if upper is not None],
+        else_=AGE_BUCKETS[-1][0],
+    )
+
+
+def filters_signature(filters: DogFilterSchema) -> str:
+    """Ключ кэша, не зависящий от порядка и повторов tag_ids."""
+    normalized = filters.model_copy(update={"tag_ids": sorted(set(filters.tag_ids))})
+    return normalized.model_dump_json()
+
+
+def apply_dog_filters(query: Select, filters: DogFilterSchema) -> Select:
+    """Добавляет к запросу условия WHERE по фильтрам каталога собак."""
+    if filters.breed is not None:
+        query = query.where(DogModel.breed == filters.breed)
+    if filters.gender is not None:
+        query = query.where(DogModel.gender == filters.gender)
+    if filters.age_min is not None:
+        query = query.where(DogModel.age >= filters.age_min)
+    if filters.age_max is not None:
+        query = query.where(DogModel.age <= filters.age_max)
+    if filters.intake_from is not None:
+        query = query.where(DogModel.intake_date >= filters.intake_from)
+    if filters.intake_to is not None:
+        query = query.where(DogModel.intake_date <= filters.intake_to)
+    if filters.veterinary_passport is not None:
+        query = query.where(DogModel.veterinary_passport == filters.veterinary_passport)
+
+    if filters.tag_ids:
+        tag_ids = set(filters.tag_ids)
+        tagged = select(tag_dog.c.dog_id).where(tag_dog.c.tag_id.in_(tag_ids))
+        if filters.tag_mode == TagMatchEnum.ALL:
+            tagged = (tagged
+                      .group_by(tag_dog.c.dog_id)
+                      .having(func.count(tag_dog.c.tag_id) == len(tag_ids)))
+        query = query.where(DogModel.id.in_(tagged))
+    return query
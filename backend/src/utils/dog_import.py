@@ -0,0 +1,214 @@
+import asyncio
+import codecs
+import csv
+import io
+import json
+import re
+from datetime import date
+from itertools import islice
+from typing import AsyncIterator, Iterator
+from fastapi import HTTPException, UploadFile
+from pydantic import ValidationError
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.enums import DataFormatEnum
+from src.models.tags import TagModel
+from src.schemas.dogs import DogImportRowSchema, DogImportErrorSchema, DogImportReportSchema
+from src.utils.image_store import find_images, add_image_refs
+from src.utils.image_variants import build_image_variants, image_keys
+from src.utils.storage import storage, local_key, publish_after_commit
+
+DOG_COPY_COLUMNS = ("id", "name", "age", "breed", "description", "intake_date",
+                    "veterinary_passport", "gender", "image_url", "image_variants")
+# Имена файлов собак: sha256 для загрузок через форму, uuid для прямых загрузок
+DOG_IMAGE_KEY_RE = re.compile(r"^dogs/(?:[0-9a-f]{64}|[0-9a-f]{32})\.(?:jpg|png|webp)$")
+TAG_DOG_COPY_COLUMNS = ("dog_id", "tag_id")
+
+
+def _iter_raw_rows(file: UploadFile, fmt: DataFormatEnum) -> Iterator[tuple[int, dict | str]]:
+    """Лениво читает файл построчно; вместо строки с ошибкой разбора отдаёт её текст."""
+    text = io.TextIOWrapper(file.file, encoding="utf-8-sig", newline="")
+    if fmt == DataFormatEnum.CSV:
+        reader = csv.DictReader(text)
+        for row in reader:
+            yield reader.line_num, row
+        return
+    for line_num, line in enumerate(text, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except json.JSONDecodeError as exc:
+            yield line_num, f"Некорректный JSON: {exc.msg}"
+            continue
+        yield line_num, row if isinstance(row, dict) else "Строка должна быть JSON-объектом"
+
+
+async def iter_batches(file: UploadFile, fmt: DataFormatEnum,
+                       batch_size: int) -> AsyncIterator[list[tuple[int, dict | str]]]:
+    """Разбирает загруженный файл порциями в рабочем потоке, не блокируя event loop."""
+    rows = _iter_raw_rows(file, fmt)
+    while True:
+        try:
+            batch = await asyncio.to_thread(lambda: list(islice(rows, batch_size)))
+        except (csv.Error, UnicodeDecodeError) as exc:
+            raise ValueError(f"Не удалось прочитать файл: {exc}") from exc
+        if not batch:
+            return
+        yield batch
+
+
+def dog_image_key(image_url: str) -> str | None:
+    """Ключ уже загруженного изображения собаки или None для любого другого URL."""
+    key = storage.key_for(image_url) or local_key(image_url)
+    if key is None or DOG_IMAGE_KEY_RE.match(key) is None:
+        return None
+    return key
+
+
+def detect_format(file: UploadFile, fmt: DataFormatEnum | None) -> DataFormatEnum:
+    if fmt is not None:
+        return fmt
+    filename = (file.filename or "").lower()
+    if filename.endswith((".ndjson", ".jsonl")):
+        return DataFormatEnum.NDJSON
+    return DataFormatEnum.CSV
+
+
+async def load_tag_map(session: AsyncSession) -> dict[str, int]:
+    """Сопоставляет и id, и названия тегов (без учёта регистра) с id тега."""
+    result = await session.execute(select(TagModel.id, TagModel.name))
+    tag_map = {}
+    for tag_id, name in result.all():
+        tag_map[name.casefold()] = tag_id
+        tag_map[str(tag_id)] = tag_id
+    return tag_map
+
+
+class DogImporter:
+    def __init__(self, session: AsyncSession, tag_map: dict[str, int]):
+        self.session = session
+        self.tag_map = tag_map
+        self.imported: list[tuple[int, str | None, dict[str, str] | None]] = []
+        self.errors: list[DogImportErrorSchema] = []
+
+    def validate(self, batch: list[tuple[int, dict | str]]):
+        valid = []
+        for row_num, raw in batch:
+            if isinstance(raw, str):
+                self.errors.append(DogImportErrorSchema(row=row_num, detail=raw))
+                continue
+            try:
+                row = DogImportRowSchema.model_validate(
+                    {key: value for key, value in raw.items() if value not in ("", None)}
+                )
+            except ValidationError as exc:
+                detail = "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}"
+                                   for err in exc.errors())
+                self.errors.append(DogImportErrorSchema(row=row_num, detail=detail))
+                continue
+
+            missing = [tag for tag in row.tags if tag.casefold() not in self.tag_map]
+            if missing:
+                self.errors.append(DogImportErrorSchema(
+                    row=row_num, detail=f"Теги не найдены: {', '.join(missing)}"))
+                continue
+            tag_ids = {self.tag_map[tag.casefold()] for tag in row.tags}
+            if row.image_url is not None:
+                key = dog_image_key(row.image_url)
+                if key is None:
+                    self.errors.append(DogImportErrorSchema(
+                        row=row_num, detail="image_url должен указывать на загруженное "
+                                            "изображение собаки"))
+                    continue
+                row.image_url = storage.url(key)
+            valid.append((row_num, row, tag_ids))
+        return valid
+
+    async def check_images(self, valid):
+        """Отбрасывает строки, чьи изображения отсутствуют в хранилище."""
+        present = []
+        for row_num, row, tag_ids in valid:
+            if row.image_url is not None and not await storage.exists(dog_image_key(row.image_url)):
+                self.errors.append(DogImportErrorSchema(
+                    row=row_num, detail=f"Изображение не найдено: {row.image_url}"))
+                continue
+            present.append((row_num, row, tag_ids))
+        return present
+
+    async def resolve_images(self, valid):
+        """Находит варианты изображений порции.
+
+        Уже учтённые изображения берутся из image_ref одним запросом, для
+        новых строятся варианты; строки с необрабатываемым изображением
+        отбрасываются.
+        """
+        known = await find_images(self.session, (row.image_url for _, row, _ in valid
+                                                 if row.image_url is not None))
+        failed = {}
+        resolved = []
+        for row_num, row, tag_ids in valid:
+            image_url = row.image_url
+            if image_url is not None and image_url not in known and image_url not in failed:
+                try:
+                    known[image_url] = await build_image_variants(image_url)
+                except HTTPException as exc:
+                    failed[image_url] = exc.detail
+                else:
+                    publish_after_commit(self.session, image_keys(image_url, known[image_url]))
+            if image_url in failed:
+                self.errors.append(DogImportErrorSchema(
+                    row=row_num, detail=f"{failed[image_url]}: {image_url}"))
+                continue
+            resolved.append((row_num, row, tag_ids, known.get(image_url)))
+        return resolved
+
+    async def copy(self, resolved) -> list[tuple[int, str | None, dict[str, str] | None]]:
+        """Загружает строки из resolve_images через COPY в dog и tag_dog.
+
+        Id заранее берутся из последовательности, чтобы связать собак с тегами
+        без повторного чтения вставленных строк. Ссылки на изображения
+        учитываются в image_ref в той же транзакции.
+        """
+        if not resolved:
+            return []
+        result = await self.session.execute(
+            select(func.nextval("dog_id_seq")).select_from(func.generate_series(1, len(resolved)))
+        )
+        dog_ids = result.scalars().all()
+
+        dog_records = []
+        tag_records = []
+        loaded = []
+        for dog_id, (_, row, tag_ids, image_variants) in zip(dog_ids, resolved):
+            dog_records.append((dog_id, row.name, row.age, row.breed, row.description,
+                                row.intake_date or date.today(), row.veterinary_passport,
+                                row.gender.name, row.image_url,
+                                None if image_variants is None else json.dumps(image_variants)))
+            loaded.append((dog_id, row.image_url, image_variants))
+            tag_records.extend((dog_id, tag_id) for tag_id in tag_ids)
+        await add_image_refs(self.session,
+                             [image_url for _, image_url, _ in loaded if image_url is not None],
+                             {image_url: variants for _, image_url, variants in loaded})
+
+        connection = await self.session.connection()
+        raw_connection = await connection.get_raw_connection()
+        driver = raw_connection.driver_connection
+        await driver.copy_records_to_table("dog", records=dog_records, columns=DOG_COPY_COLUMNS)
+        if tag_records:
+            await driver.copy_records_to_table("tag_dog", records=tag_records,
+                                               columns=TAG_DOG_COPY_COLUMNS)
+        return loaded
+
+    def accept(self, loaded: list[tuple[int, str | None, dict[str, str] | None]]):
+        self.imported.extend(loaded)
+
+    def reject(self, resolved, exc: Exception):
+        detail = f"Ошибка загрузки порции: {getattr(exc, 'orig', exc)}"
+        self.errors.extend(DogImportErrorSchema(row=row_num, detail=detail)
+                           for row_num, *_ in resolved)
+
+    def report(self) -> DogImportReportSchema:
+        errors = sorted(self.errors, key=lambda error: error.row)
+        return DogImportReportSchema(imported=len(self.imported), failed=len(errors),
+                                     errors=errors)
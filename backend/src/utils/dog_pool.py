@@ -0,0 +1,94 @@
+import asyncio
+import random
+from sqlalchemy import select
+from src.database import new_session
+from src.models.dogs import DogModel
+from src.schemas.dogs import DogImagesRandomSchema
+from src.utils.etag import DOGS, resource_version
+from src.utils.invalidation import on_change
+
+POOL_LOAD_ATTEMPTS = 3
+
+
+class DogImagePool:
+    """Пул фотографий собак (id, image_url, варианты) для выборки на главной странице.
+
+    Список хранится вместе с индексом позиций, поэтому добавление, замена и
+    удаление выполняются за O(1), а выборка k элементов без повторов — за O(k).
+    """
+
+    def __init__(self):
+        self._items: list[DogImagesRandomSchema] = []
+        self._positions: dict[int, int] = {}
+        self._loaded = False
+        self._warming: asyncio.Task | None = None
+        # Счётчик изменений пула из обработчиков этого процесса
+        self._changes = 0
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._loaded
+
+    async def load(self):
+        """Полностью перечитывает пул из БД.
+
+        Снимок отбрасывается, если за время запроса собаки изменились: иначе
+        он затёр бы изменение, уже внесённое в пул обработчиком. Если
+        согласованный снимок получить не удалось, пул считается незагруженным
+        и выборка идёт через БД до следующей загрузки.
+        """
+        for _ in range(POOL_LOAD_ATTEMPTS):
+            changes = self._changes
+            async with new_session() as session:
+                version = await resource_version(session, DOGS)
+                result = await session.execute(
+                    select(DogModel.id, DogModel.image_url, DogModel.image_variants)
+                    .where(DogModel.image_url.isnot(None))
+                )
+                rows = result.all()
+                stable = await resource_version(session, DOGS) == version
+            if stable and changes == self._changes:
+                self._items = [DogImagesRandomSchema(id=dog_id, image_url=image_url,
+                                                     image_variants=image_variants)
+                               for dog_id, image_url, image_variants in rows]
+                self._positions = {item.id: i for i, item in enumerate(self._items)}
+                self._loaded = True
+                return
+        self._loaded = False
+
+    def warm(self):
+        """Запускает загрузку пула в фоне, если она ещё не идёт."""
+        if self._warming is None or self._warming.done():
+            self._warming = asyncio.create_task(self.load())
+
+    def upsert(self, dog_id: int, image_url: str | None,
+               image_variants: dict[str, str] | None = None):
+        if image_url is None:
+            self.discard(dog_id)
+            return
+        self._changes += 1
+        item = DogImagesRandomSchema(id=dog_id, image_url=image_url,
+                                     image_variants=image_variants)
+        position = self._positions.get(dog_id)
+        if position is None:
+            self._positions[dog_id] = len(self._items)
+            self._items.append(item)
+        else:
+            self._items[position] = item
+
+    def discard(self, dog_id: int):
+        self._changes += 1
+        position = self._positions.pop(dog_id, None)
+        if position is None:
+            return
+        last = self._items.pop()
+        if position < len(self._items):
+            self._items[position] = last
+            self._positions[last.id] = position
+
+    def sample(self, k: int) -> list[DogImagesRandomSchema]:
+        return random.sample(self._items, min(k, len(self._items)))
+
+
+dog_image_pool = DogImagePool()
+on_change(DOGS, dog_image_pool.warm)
@@ -0,0 +1,69 @@
+import hashlib
+from fastapi import Request, Response
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.models.versions import ResourceVersionModel
+
+DOGS = "dogs"
+TAGS = "tags"
+NEWS = "news"
+REQUESTS = "requests"
+USERS = "users"
+
+ETAG_CACHE_CONTROL = "no-cache"
+
+
+async def bump_versions(session: AsyncSession, *resources: str):
+    """Увеличивает версии ресурсов в текущей транзакции.
+
+    Вызывается непосредственно перед commit, чтобы блокировка строки версии
+    держалась как можно меньше.
+    """
+    stmt = insert(ResourceVersionModel).values(
+        [{"name": resource, "version": 1} for resource in resources]
+    )
+    await session.execute(stmt.on_conflict_do_update(
+        index_elements=[ResourceVersionModel.name],
+        set_={"version": ResourceVersionModel.version + 1},
+    ))
+
+
+async def resource_version(session: AsyncSession, resource: str) -> int:
+    result = await session.execute(
+        select(ResourceVersionModel.version).where(ResourceVersionModel.name == resource)
+    )
+    return result.scalar_one_or_none() or 0
+
+
+async def resource_etag(session: AsyncSession, request: Request, *resources: str) -> str:
+    """Слабый ETag из версий ресурсов и адреса запроса (путь и параметры)."""
+    result = await session.execute(
+        select(ResourceVersionModel.name, ResourceVersionModel.version)
+        .where(ResourceVersionModel.name.in_(resources))
+    )
+    versions = dict(result.all())
+    token = ".".join(str(versions.get(resource, 0)) for resource in resources)
+    target = f"{request.url.path}?{request.url.query}".encode()
+    return f'W/"{token}-{hashlib.sha1(target).hexdigest()[:16]}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return "*" in tags or etag.removeprefix("W/") in tags
+
+
+async def conditional_get(session: AsyncSession, request: Request, response: Response,
+                          *resources: str) -> Response | None:
+    """Возвращает готовый 304, если версия клиента актуальна.
+
+    Иначе добавляет ETag к ответу обработчика и возвращает None.
+    """
+    etag = await resource_etag(session, request, *resources)
+    headers = {"etag": etag, "cache-control": ETAG_CACHE_CONTROL}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
@@ -1,9 +1,48 @@
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
 from passlib.context import CryptContext
 
-pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
+# Значения по умолчанию совпадают с passlib, поэтому существующие хеши
+# не перехешируются, пока параметры не изменены явно.
+ARGON2_TIME_COST = int(os.getenv("ARGON2_TIME_COST", "3"))
+ARGON2_MEMORY_COST = int(os.getenv("ARGON2_MEMORY_COST", "65536"))
+ARGON2_PARALLELISM = int(os.getenv("ARGON2_PARALLELISM", "4"))
+# Каждое вычисление держит memory_cost КиБ памяти, поэтому их число ограничено
+HASH_WORKERS = int(os.getenv("HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+pwd_context = CryptContext(
+    schemes=["argon2"],
+    deprecated="auto",
+    argon2__rounds=ARGON2_TIME_COST,
+    argon2__memory_cost=ARGON2_MEMORY_COST,
+    argon2__parallelism=ARGON2_PARALLELISM,
+)
 
-def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+# argon2-cffi отпускает GIL, так что потоков достаточно для параллельного хеширования
+_executor = ThreadPoolExecutor(max_workers=HASH_WORKERS, thread_name_prefix="argon2")
+_slots = asyncio.Semaphore(HASH_WORKERS)
+
+
+async def _run(func, *args):
+    async with _slots:
+        return await asyncio.get_running_loop().run_in_executor(_executor, func, *args)
+
+
+async def verify_password(plain_password: str, hashed_password: str) -> bool:
+    return await _run(pwd_context.verify, plain_password, hashed_password)
+
+
+async def verify_and_update(plain_password: str,
+                            hashed_password: str) -> tuple[bool, str | None]:
+    """Проверяет пароль и, если хеш создан с устаревшими параметрами,
+    возвращает новый хеш для сохранения."""
+    return await _run(pwd_context.verify_and_update, plain_password, hashed_password)
+
+
+async def get_password_hash(password: str) -> str:
+    return await _run(pwd_context.hash, password)
+
+
+def shutdown_hashing_executor():
+    _executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,133 @@
+import argparse
+import asyncio
+import os
+import time
+from dataclasses import dataclass, asdict
+from itertools import islice
+from pathlib import Path as SysPath
+from sqlalchemy import select
+from src.database import new_session
+from src.models.dogs import DogModel
+from src.models.news import NewsModel
+from src.models.images import ImageRefModel
+from src.utils.image_variants import variant_urls
+from src.utils.storage import storage, staging_path, local_key
+from src.utils.validate_image import UPLOAD_DIR, NEWS_UPLOAD_DIR
+
+IMAGE_GC_GRACE_PERIOD = int(os.getenv("IMAGE_GC_GRACE_PERIOD", str(24 * 60 * 60)))
+IMAGE_GC_INTERVAL = int(os.getenv("IMAGE_GC_INTERVAL", "0"))
+SCAN_BATCH_SIZE = 1000
+
+
+@dataclass
+class ReconcileReport:
+    scanned: int = 0
+    orphans: int = 0
+    deleted: int = 0
+    bytes_reclaimed: int = 0
+    missing: int = 0
+    dry_run: bool = False
+
+
+async def collect_referenced_paths() -> set[SysPath]:
+    """Собирает пути всех файлов, на которые ссылаются собаки, новости и image_ref.
+
+    Строки читаются серверным курсором, поэтому в памяти держатся только пути.
+    """
+    referenced = set()
+    sources = (
+        select(DogModel.image_url, DogModel.image_variants).where(DogModel.image_url.isnot(None)),
+        select(NewsModel.image_url, NewsModel.image_variants).where(NewsModel.image_url.isnot(None)),
+        select(ImageRefModel.url, ImageRefModel.image_variants).where(ImageRefModel.ref_count > 0),
+    )
+    async with new_session() as session:
+        for query in sources:
+            result = await session.stream(query.execution_options(yield_per=SCAN_BATCH_SIZE))
+            async for rows in result.partitions():
+                for image_url, image_variants in rows:
+                    for url in variant_urls(image_variants) | {image_url}:
+                        key = storage.key_for(url) or local_key(url)
+                        if key is not None:
+                            referenced.add(staging_path(key))
+    return referenced
+
+
+def _stat_batch(entries, batch_size: int) -> list[tuple[SysPath, int, float]]:
+    batch = []
+    for entry in islice(entries, batch_size):
+        if entry.is_file(follow_symlinks=False):
+            stat_result = entry.stat(follow_symlinks=False)
+            batch.append((SysPath(entry.path), stat_result.st_size, stat_result.st_mtime))
+    return batch
+
+
+def _delete(paths: list[SysPath], cutoff: float) -> list[SysPath]:
+    """Удаляет файлы, повторно проверяя время изменения: с момента сканирования
+    файл могли загрузить заново."""
+    deleted = []
+    for path in paths:
+        try:
+            if path.stat().st_mtime >= cutoff:
+                continue
+            path.unlink()
+            deleted.append(path)
+        except FileNotFoundError:
+            continue
+    return deleted
+
+
+async def reconcile_orphans(grace_period: int = IMAGE_GC_GRACE_PERIOD,
+                            dry_run: bool = False,
+                            batch_size: int = SCAN_BATCH_SIZE) -> ReconcileReport:
+    """Удаляет из каталогов загрузок файлы, на которые никто не ссылается.
+
+    Файлы моложе grace_period секунд не трогаются: они могли быть загружены
+    уже после чтения ссылок из базы.
+    """
+    report = ReconcileReport(dry_run=dry_run)
+    referenced = await collect_referenced_paths()
+    seen = set()
+    cutoff = time.time() - grace_period
+
+    for directory in (UPLOAD_DIR, NEWS_UPLOAD_DIR):
+        with os.scandir(directory) as entries:
+            while batch := await asyncio.to_thread(_stat_batch, entries, batch_size):
+                report.scanned += len(batch)
+                orphans = {}
+                for path, size, mtime in batch:
+                    seen.add(path)
+                    if path not in referenced and mtime < cutoff:
+                        orphans[path] = size
+                report.orphans += len(orphans)
+                if dry_run or not orphans:
+                    continue
+                for path in await asyncio.to_thread(_delete, list(orphans), cutoff):
+                    report.deleted += 1
+                    report.bytes_reclaimed += orphans[path]
+
+    upload_dirs = {UPLOAD_DIR, NEWS_UPLOAD_DIR}
+    report.missing = sum(1 for path in referenced - seen if path.parent in upload_dirs)
+    return report
+
+
+async def run_image_gc():
+    report = await reconcile_orphans()
+    print(f"Очистка изображений: удалено {report.deleted} из {report.orphans} "
+          f"неиспользуемых файлов, освобождено {report.bytes_reclaimed} байт")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Удаление неиспользуемых изображений из static/")
+    parser.add_argument("--grace-period", type=int, default=IMAGE_GC_GRACE_PERIOD,
+                        help="минимальный возраст удаляемого файла в секундах")
+    parser.add_argument("--batch-size", type=int, default=SCAN_BATCH_SIZE)
+    parser.add_argument("--dry-run", action="store_true",
+                        help="только посчитать файлы, ничего не удаляя")
+    args = parser.parse_args()
+    report = asyncio.run(reconcile_orphans(args.grace_period, args.dry_run, args.batch_size))
+    for key, value in asdict(report).items():
+        print(f"{key}: {value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+import asyncio
+import fcntl
+import hashlib
+import os
+import time
+from pathlib import Path as SysPath
+from fastapi import HTTPException
+from PIL import Image, ImageOps
+from src.enums import ImageFormatEnum
+from src.utils.image_variants import get_image_executor, save_image
+
+IMAGE_CACHE_DIR = SysPath(os.getenv("IMAGE_CACHE_DIR", "cache/images"))
+IMAGE_CACHE_MAX_BYTES = int(os.getenv("IMAGE_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+EVICTION_GRACE = 60
+SWEEP_FRACTION = 0.05
+LOCK_NAME = ".lock"
+MAX_RESIZE_DIMENSION = 2048
+# Разрешённые значения w и h: каждый новый размер стоит пересчёта и места в кэше,
+# поэтому произвольные размеры не принимаются
+RESIZE_DIMENSIONS = frozenset(
+    int(size) for size in os.getenv("RESIZE_DIMENSIONS", "160,320,480,640,960,1280,1920")
+    .split(",") if size.strip() and 0 < int(size) <= MAX_RESIZE_DIMENSION
+)
+FORMAT_EXTENSIONS = {
+    ImageFormatEnum.JPEG: "jpg",
+    ImageFormatEnum.PNG: "png",
+    ImageFormatEnum.WEBP: "webp",
+}
+SOURCE_FORMATS = {"jpg": ImageFormatEnum.JPEG, "jpeg": ImageFormatEnum.JPEG,
+                  "png": ImageFormatEnum.PNG, "webp": ImageFormatEnum.WEBP}
+
+
+def resize_image(source_str: str, target_str: str, width: int | None, height: int | None,
+                 fmt: str) -> int:
+    """Уменьшает изображение с сохранением пропорций и пишет результат в кэш.
+
+    Выполняется в дочернем процессе, возвращает размер файла в байтах.
+    """
+    with Image.open(source_str) as source:
+        image = ImageOps.exif_transpose(source)
+        image.load()
+    image.thumbnail((width or image.width, height or image.height), Image.Resampling.LANCZOS)
+    target = SysPath(target_str)
+    save_image(image, target, fmt.upper())
+    return target.stat().st_size
+
+
+class DiskLRUCache:
+    """Ограниченный по объёму кэш файлов на диске, общий для всех воркеров.
+
+    Источник истины — сам каталог: время изменения файла обновляется при
+    каждом обращении и служит меткой давности использования. Вытесняет
+    файлы тот воркер, которому досталась файловая блокировка, по реальному
+    размеру каталога. Файлы, к которым обращались последние EVICTION_GRACE
+    секунд, не удаляются: их путь мог быть только что отдан в ответ.
+    """
+
+    def __init__(self, directory: SysPath, max_bytes: int,
+                 grace: float = EVICTION_GRACE):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.grace = grace
+        # Проход по каталогу выполняется после записи SWEEP_FRACTION от лимита
+        self._added_bytes = 0
+
+    def path(self, name: str) -> SysPath:
+        return self.directory / name
+
+    def _touch(self, name: str) -> SysPath | None:
+        path = self.path(name)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return path
+
+    async def get(self, name: str) -> SysPath | None:
+        return await asyncio.to_thread(self._touch, name)
+
+    async def load(self):
+        await asyncio.to_thread(self.directory.mkdir, parents=True, exist_ok=True)
+        await self.sweep()
+
+    async def add(self, size: int):
+        self._added_bytes += size
+        if self._added_bytes >= self.max_bytes * SWEEP_FRACTION:
+            self._added_bytes = 0
+            await self.sweep()
+
+    async def sweep(self):
+        await asyncio.to_thread(self._sweep)
+
+    def _sweep(self):
+        with open(self.directory / LOCK_NAME, "a", encoding="utf-8") as lock:
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                # Каталог уже обходит другой воркер
+                return
+            try:
+                self._evict(time.time())
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _evict(self, now: float):
+        files = []
+        total = 0
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if entry.name == LOCK_NAME or not entry.is_file(follow_symlinks=False):
+                    continue
+                try:
+                    stat_result = entry.stat(follow_symlinks=False)
+                except FileNotFoundError:
+                    continue
+                if entry.name.endswith(".part"):
+                    # Брошенные временные файлы прерванных ресайзов
+                    if stat_result.st_mtime < now - self.grace:
+                        os.unlink(entry.path)
+                    continue
+                files.append((stat_result.st_mtime, entry.path, stat_result.st_size))
+                total += stat_result.st_size
+        for mtime, path, size in sorted(files):
+            if total <= self.max_bytes or mtime >= now - self.grace:
+                break
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+
+class ImageResizer:
+    """Строит варианты изображений по запросу в пуле процессов.
+
+    Одновременные запросы одного варианта ждут общую задачу, а не
+    запускают ресайз повторно.
+    """
+
+    def __init__(self, cache: DiskLRUCache):
+        self.cache = cache
+        self._pending: dict[str, asyncio.Future] = {}
+
+    @staticmethod
+    def variant_name(source: SysPath, mtime_ns: int, width: int | None, height: int | None,
+                     fmt: ImageFormatEnum) -> str:
+        key = f"{source.as_posix()}:{mtime_ns}:{width or 0}x{height or 0}:{fmt.value}"
+        return f"{hashlib.sha256(key.encode()).hexdigest()}.{FORMAT_EXTENSIONS[fmt]}"
+
+    async def get(self, source: SysPath, name: str, width: int | None, height: int | None,
+                  fmt: ImageFormatEnum) -> SysPath:
+        cached = await self.cache.get(name)
+        if cached is not None:
+            return cached
+        pending = self._pending.get(name)
+        if pending is None:
+            pending = asyncio.ensure_future(self._build(source, name, width, height, fmt))
+            self._pending[name] = pending
+            pending.add_done_callback(lambda _: self._pending.pop(name, None))
+        return await asyncio.shield(pending)
+
+    async def _build(self, source: SysPath, name: str, width: int | None, height: int | None,
+                     fmt: ImageFormatEnum) -> SysPath:
+        target = self.cache.path(name)
+        loop = asyncio.get_running_loop()
+        try:
+            size = await loop.run_in_executor(
+                get_image_executor(), resize_image,
+                source.as_posix(), target.as_posix(), width, height, fmt.value,
+            )
+        except (OSError, Image.DecompressionBombError) as exc:
+            raise HTTPException(422, "Не удалось обработать изображение") from exc
+        await self.cache.add(size)
+        return target
+
+
+image_resizer = ImageResizer(DiskLRUCache(IMAGE_CACHE_DIR, IMAGE_CACHE_MAX_BYTES))
@@ -0,0 +1,115 @@
+import re
+from collections import Counter
+from pathlib import Path as SysPath
+from sqlalchemy import select, update, delete
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.models.images import ImageRefModel
+from src.utils.image_variants import build_image_variants, image_keys
+from src.utils.storage import (
+    storage, lock_image, lock_images, remove_after_commit, publish_after_commit,
+)
+
+
+SHA256_RE = re.compile(r"^[0-9a-f]{64}$")
+
+
+def sha256_from_url(image_url: str) -> str | None:
+    """Хеш содержимого из имени файла. Файлы прямой загрузки названы uuid,
+    их хеш неизвестен."""
+    stem = SysPath(image_url).stem
+    return stem if SHA256_RE.match(stem) else None
+
+
+async def acquire_image(session: AsyncSession, image_url: str | None) -> dict[str, str] | None:
+    """Учитывает новую ссылку на файл и возвращает карту его вариантов.
+
+    Варианты строятся только при первой ссылке на содержимое, повторная
+    загрузка той же фотографии переиспользует уже сохранённые файлы.
+    Подготовленные локально файлы публикуются в хранилище после commit.
+    """
+    if image_url is None:
+        return None
+    await lock_image(session, image_url)
+    result = await session.execute(
+        select(ImageRefModel.image_variants).where(ImageRefModel.url == image_url)
+    )
+    existing = result.one_or_none()
+    if existing is not None:
+        # Файлы уже опубликованы без метаданных; свежая локальная копия
+        # исходника не должна их перезаписать
+        image_variants = existing.image_variants
+        await storage.discard_staged(image_keys(image_url))
+    else:
+        image_variants = await build_image_variants(image_url)
+        publish_after_commit(session, image_keys(image_url, image_variants))
+
+    stmt = insert(ImageRefModel).values(
+        url=image_url,
+        sha256=sha256_from_url(image_url),
+        ref_count=1,
+        image_variants=image_variants,
+    )
+    await session.execute(stmt.on_conflict_do_update(
+        index_elements=[ImageRefModel.url],
+        set_={"ref_count": ImageRefModel.ref_count + 1},
+    ))
+    return image_variants
+
+
+async def find_images(session: AsyncSession, image_urls) -> dict[str, dict[str, str] | None]:
+    """Пакетный вариант поиска в acquire_image: блокирует учёт ссылок на все
+    URL и возвращает варианты уже учтённых изображений одним запросом."""
+    image_urls = set(image_urls)
+    if not image_urls:
+        return {}
+    await lock_images(session, image_urls)
+    result = await session.execute(
+        select(ImageRefModel.url, ImageRefModel.image_variants)
+        .where(ImageRefModel.url.in_(image_urls))
+    )
+    known = dict(result.all())
+    await storage.discard_staged({key for url in known for key in image_keys(url)})
+    return known
+
+
+async def add_image_refs(session: AsyncSession, image_urls: list[str],
+                         image_variants: dict[str, dict[str, str] | None]):
+    """Учитывает ссылки на изображения одним запросом, по одной на каждый элемент
+    image_urls. URL должны быть предварительно заблокированы через find_images."""
+    counts = Counter(image_urls)
+    if not counts:
+        return
+    stmt = insert(ImageRefModel).values([
+        {"url": url, "sha256": sha256_from_url(url), "ref_count": count,
+         "image_variants": image_variants.get(url)}
+        for url, count in counts.items()
+    ])
+    await session.execute(stmt.on_conflict_do_update(
+        index_elements=[ImageRefModel.url],
+        set_={"ref_count": ImageRefModel.ref_count + stmt.excluded.ref_count},
+    ))
+
+
+async def release_image(session: AsyncSession, image_url: str | None,
+                        image_variants: dict[str, str] | None = None):
+    """Снимает ссылку на файл; последняя ссылка планирует удаление файлов после commit.
+
+    Файлы, загруженные до появления учёта ссылок, в image_ref отсутствуют и
+    считаются используемыми только одной записью.
+    """
+    if image_url is None:
+        return
+    await lock_image(session, image_url)
+    result = await session.execute(
+        update(ImageRefModel)
+        .where(ImageRefModel.url == image_url)
+        .values(ref_count=ImageRefModel.ref_count - 1)
+        .returning(ImageRefModel.ref_count)
+    )
+    ref_count = result.scalar_one_or_none()
+    if ref_count is not None and ref_count > 0:
+        return
+    if ref_count is not None:
+        await session.execute(delete(ImageRefModel).where(ImageRefModel.url == image_url))
+    remove_after_commit(session, image_keys(image_url, image_variants), image_url)
@@ -0,0 +1,126 @@
+import asyncio
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path as SysPath
+from fastapi import HTTPException
+from PIL import Image, ImageOps
+from src.utils.storage import storage, staging_path, key_for_path
+
+VARIANT_WIDTHS = (320, 640, 1280)
+WEBP_QUALITY = 80
+JPEG_QUALITY = 85
+IMAGE_WORKERS = int(os.getenv("IMAGE_WORKERS", "2"))
+# Pillow открывает снимки многих телефонов как MPO (JPEG с дополнительными кадрами),
+# а сохранять их нужно обычным JPEG
+SAVE_FORMATS = {"JPEG": "JPEG", "MPO": "JPEG", "PNG": "PNG", "WEBP": "WEBP"}
+
+_executor: ProcessPoolExecutor | None = None
+
+
+def get_image_executor() -> ProcessPoolExecutor:
+    global _executor  # pylint: disable=global-statement
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=IMAGE_WORKERS)
+    return _executor
+
+
+def shutdown_image_executor():
+    global _executor  # pylint: disable=global-statement
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+def save_image(image: Image.Image, path: SysPath, fmt: str):
+    """Сохраняет без EXIF и прочих метаданных через временный файл."""
+    tmp_path = path.with_name(f".{path.name}.part")
+    if fmt == "WEBP":
+        image.save(tmp_path, fmt, quality=WEBP_QUALITY, method=4)
+    elif fmt == "JPEG":
+        image.convert("RGB").save(tmp_path, fmt, quality=JPEG_QUALITY, optimize=True,
+                                  progressive=True)
+    else:
+        image.save(tmp_path, fmt, optimize=True)
+    os.replace(tmp_path, path)
+
+
+def generate_variants(path_str: str) -> dict[str, list[tuple[int, str]]]:
+    """Перекодирует оригинал без EXIF и строит уменьшенные копии и WebP-версии.
+
+    Выполняется в дочернем процессе. Возвращает для каждого формата список
+    пар (ширина, путь к файлу).
+    """
+    path = SysPath(path_str)
+    with Image.open(path) as source:
+        fmt = SAVE_FORMATS.get(source.format, "JPEG")
+        image = ImageOps.exif_transpose(source)
+        image.load()
+
+    save_image(image, path, fmt)
+    variants = {fmt.lower(): [(image.width, path.as_posix())]}
+    if fmt != "WEBP":
+        webp_path = path.with_suffix(".webp")
+        save_image(image, webp_path, "WEBP")
+        variants["webp"] = [(image.width, webp_path.as_posix())]
+
+    for width in VARIANT_WIDTHS:
+        if width >= image.width:
+            break
+        resized = image.copy()
+        resized.thumbnail((width, image.height), Image.Resampling.LANCZOS)
+        for variant_fmt in variants:
+            variant_path = path.with_name(f"{path.stem}_{width}.{variant_fmt}")
+            save_image(resized, variant_path, variant_fmt.upper())
+            variants[variant_fmt].append((width, variant_path.as_posix()))
+    return variants
+
+
+def to_srcset(variants: dict[str, list[tuple[int, str]]]) -> dict[str, str]:
+    return {
+        fmt: ", ".join(f"{storage.url(key_for_path(path))} {width}w" for width, path in sorted(items))
+        for fmt, items in variants.items()
+    }
+
+
+def variant_urls(image_variants: dict[str, str] | None) -> set[str]:
+    """URL всех файлов из карты вариантов, включая оригинал."""
+    if not image_variants:
+        return set()
+    return {
+        candidate.strip().split(" ")[0]
+        for srcset in image_variants.values()
+        for candidate in srcset.split(",")
+        if candidate.strip()
+    }
+
+
+def image_keys(image_url: str | None, image_variants: dict[str, str] | None = None) -> set[str]:
+    """Ключи хранилища для изображения и всех его вариантов."""
+    urls = variant_urls(image_variants)
+    if image_url is not None:
+        urls.add(image_url)
+    return {key for key in map(storage.key_for, urls) if key is not None}
+
+
+async def build_image_variants(image_url: str | None) -> dict[str, str] | None:
+    """Строит варианты для файла, подготовленного локально.
+
+    Файлы, загруженные браузером напрямую в объектное хранилище, локальной
+    копии не имеют и отдаются без вариантов.
+    """
+    if image_url is None:
+        return None
+    key = storage.key_for(image_url)
+    if key is None:
+        return None
+    path = staging_path(key)
+    if not await asyncio.to_thread(path.is_file):
+        return None
+    loop = asyncio.get_running_loop()
+    try:
+        variants = await loop.run_in_executor(get_image_executor(), generate_variants,
+                                              path.as_posix())
+    except (OSError, Image.DecompressionBombError) as exc:
+        await asyncio.to_thread(path.unlink, missing_ok=True)
+        raise HTTPException(400, "Не удалось обработать изображение") from exc
+    return to_srcset(variants)
@@ -15,7 +15,7 @@ async def create_admin_user():
             if not existing_user:
                 admin = UserModel(
                     username="admin",
-                    password=get_password_hash("admin"),
+                    password=await get_password_hash("admin"),
                     email="admin@example.com",
                     role="Admin"
                 )
@@ -0,0 +1,111 @@
+import asyncio
+import inspect
+import json
+import uuid
+from collections import defaultdict
+from typing import Callable
+import asyncpg
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.database import engine
+from src.utils.etag import bump_versions
+
+CHANNEL = "cache_invalidation"
+WORKER_ID = uuid.uuid4().hex
+RECONNECT_DELAY = 5.0
+
+_handlers: dict[str, list[Callable]] = defaultdict(list)
+
+
+def on_change(resource: str, handler: Callable):
+    """Регистрирует сброс кэша воркера при изменении ресурса в другом воркере."""
+    _handlers[resource].append(handler)
+
+
+async def publish_changes(session: AsyncSession, *resources: str):
+    """Отмечает изменение ресурсов в текущей транзакции.
+
+    Увеличивает версии для ETag и ставит NOTIFY, который Postgres доставит
+    слушателям только после commit; при откате уведомление не уходит.
+    """
+    await bump_versions(session, *resources)
+    payload = json.dumps({"origin": WORKER_ID, "resources": list(resources)})
+    await session.execute(select(func.pg_notify(CHANNEL, payload)))
+
+
+async def dispatch(resources):
+    handlers = dict.fromkeys(handler for resource in resources for handler in _handlers[resource])
+    for handler in handlers:
+        try:
+            result = handler()
+            if inspect.isawaitable(result):
+                await result
+        except Exception as e:
+            print(f"Ошибка при сбросе кэша: {e}")
+
+
+class InvalidationListener:
+    """LISTEN на отдельном соединении asyncpg.
+
+    События собственного воркера пропускаются: обработчик записи уже
+    обновил локальные кэши. После переподключения сбрасываются все кэши,
+    так как уведомления за время разрыва потеряны.
+    """
+
+    def __init__(self, dsn: str, reconnect_delay: float = RECONNECT_DELAY):
+        self.dsn = dsn
+        self.reconnect_delay = reconnect_delay
+        self._task: asyncio.Task | None = None
+        self._dispatching: set[asyncio.Task] = set()
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(), name="invalidation_listener")
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, *self._dispatching, return_exceptions=True)
+        self._task = None
+
+    def _on_notify(self, connection, pid, channel, payload):
+        try:
+            event = json.loads(payload)
+        except ValueError:
+            return
+        if event.get("origin") == WORKER_ID:
+            return
+        self._spawn(event.get("resources", []))
+
+    def _spawn(self, resources):
+        task = asyncio.create_task(dispatch(resources))
+        self._dispatching.add(task)
+        task.add_done_callback(self._dispatching.discard)
+
+    async def _run(self):
+        connected_before = False
+        while True:
+            connection = None
+            try:
+                connection = await asyncpg.connect(self.dsn)
+                closed = asyncio.Event()
+                connection.add_termination_listener(lambda _: closed.set())
+                await connection.add_listener(CHANNEL, self._on_notify)
+                if connected_before:
+                    self._spawn(list(_handlers))
+                connected_before = True
+                await closed.wait()
+            # Разрыв соединения приходит и как asyncpg.InterfaceError, а не только как
+            # PostgresError; любая ошибка должна вести к переподключению, а не завершать задачу
+            except Exception as e:
+                print(f"Ошибка соединения шины инвалидации: {e}")
+            finally:
+                if connection is not None and not connection.is_closed():
+                    connection.terminate()
+            await asyncio.sleep(self.reconnect_delay)
+
+
+invalidation_listener = InvalidationListener(
+    engine.url.set(drivername="postgresql").render_as_string(hide_password=False)
+)
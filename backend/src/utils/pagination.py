@@ -0,0 +1,22 @@
+import base64
+import json
+from fastapi import HTTPException
+
+
+def encode_cursor(values: dict) -> str:
+    """Упаковывает значения ключа последней записи страницы в непрозрачный курсор."""
+    raw = json.dumps(values, separators=(",", ":"), default=str).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str | None) -> dict | None:
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(values, dict):
+            raise ValueError
+        return values
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail="Неверный курсор пагинации") from exc
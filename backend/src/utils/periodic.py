@@ -0,0 +1,22 @@
+import asyncio
+from typing import Awaitable, Callable
+
+
+async def run_periodically(interval: float, job: Callable[[], Awaitable], name: str):
+    """Запускает job каждые interval секунд; ошибка одного запуска не останавливает цикл."""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await job()
+        except Exception as e:
+            print(f"Ошибка фоновой задачи {name}: {e}")
+
+
+def start_periodic(interval: float, job: Callable[[], Awaitable], name: str) -> asyncio.Task:
+    return asyncio.create_task(run_periodically(interval, job, name), name=name)
+
+
+async def stop_tasks(tasks: list[asyncio.Task]):
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
@@ -0,0 +1,99 @@
+import csv
+import io
+import json
+from datetime import datetime
+from enum import Enum
+from typing import AsyncIterator
+from sqlalchemy import Select, select
+from src.database import new_session
+from src.enums import DataFormatEnum
+from src.models.requests import RequestModel, AdoptionRequestModel, GuardianRequestModel
+from src.schemas.requests import RequestFilterSchema
+from src.utils.request_filters import apply_request_filters
+
+EXPORT_BATCH_SIZE = 1000
+# Ячейки с такими первыми символами табличные редакторы считают формулами
+CSV_FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+EXPORT_COLUMNS = (
+    RequestModel.id,
+    RequestModel.dog_id,
+    RequestModel.type,
+    RequestModel.status,
+    RequestModel.created_at,
+    RequestModel.closed_at,
+    RequestModel.full_name,
+    RequestModel.phone,
+    RequestModel.email,
+    AdoptionRequestModel.family_member_count,
+    AdoptionRequestModel.had_experience_adoption_pet,
+    AdoptionRequestModel.adoption_purpose,
+    AdoptionRequestModel.housing_type,
+    AdoptionRequestModel.housing_area,
+    GuardianRequestModel.id.label("guardian_request_id"),
+)
+EXPORT_HEADER = [column.key for column in EXPORT_COLUMNS]
+
+MEDIA_TYPES = {
+    DataFormatEnum.CSV: "text/csv; charset=utf-8",
+    DataFormatEnum.NDJSON: "application/x-ndjson",
+}
+
+
+def build_export_query(filters: RequestFilterSchema) -> Select:
+    query = (
+        select(*EXPORT_COLUMNS)
+        .outerjoin(AdoptionRequestModel, AdoptionRequestModel.request_id == RequestModel.id)
+        .outerjoin(GuardianRequestModel, GuardianRequestModel.request_id == RequestModel.id)
+    )
+    return apply_request_filters(query, filters).order_by(RequestModel.id)
+
+
+def _plain(value):
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def _csv_cell(value):
+    value = _plain(value)
+    if isinstance(value, str) and value.startswith(CSV_FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def _encode_csv(rows, with_header: bool) -> str:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if with_header:
+        writer.writerow(EXPORT_HEADER)
+    writer.writerows([_csv_cell(value) for value in row] for row in rows)
+    return buffer.getvalue()
+
+
+def _encode_ndjson(rows) -> str:
+    return "".join(
+        json.dumps(dict(zip(EXPORT_HEADER, map(_plain, row))), ensure_ascii=False) + "\n"
+        for row in rows
+    )
+
+
+async def stream_requests(filters: RequestFilterSchema,
+                          fmt: DataFormatEnum) -> AsyncIterator[str]:
+    """Построчно выгружает заявки через серверный курсор порциями по EXPORT_BATCH_SIZE.
+
+    Сессия открывается внутри генератора, потому что ответ отдаётся уже после
+    выхода из обработчика.
+    """
+    query = build_export_query(filters).execution_options(yield_per=EXPORT_BATCH_SIZE)
+    if fmt == DataFormatEnum.CSV:
+        yield _encode_csv([], with_header=True)
+    async with new_session() as session:
+        result = await session.stream(query)
+        async for rows in result.partitions():
+            if fmt == DataFormatEnum.CSV:
+                yield _encode_csv(rows, with_header=False)
+            else:
+                yield _encode_ndjson(rows)
@@ -0,0 +1,18 @@
+from sqlalchemy import Select, Update
+from src.models.requests import RequestModel
+from src.schemas.requests import RequestFilterSchema
+
+
+def apply_request_filters(query: Select | Update,
+                          filters: RequestFilterSchema) -> Select | Update:
+    if filters.status is not None:
+        query = query.where(RequestModel.status == filters.status)
+    if filters.type is not None:
+        query = query.where(RequestModel.type == filters.type)
+    if filters.dog_id is not None:
+        query = query.where(RequestModel.dog_id == filters.dog_id)
+    if filters.created_from is not None:
+        query = query.where(RequestModel.created_at >= filters.created_from)
+    if filters.created_to is not None:
+        query = query.where(RequestModel.created_at <= filters.created_to)
+    return query
@@ -0,0 +1,74 @@
+import os
+import re
+import stat
+from pathlib import PurePosixPath
+import anyio
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import StaticFiles, NotModifiedResponse
+from starlette.types import Scope
+
+FINGERPRINT_RE = re.compile(r"^[0-9a-f]{64}(_\d+)?$")
+WEBP_SOURCE_SUFFIXES = (".jpg", ".jpeg", ".png")
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "public, no-cache"
+# Префикс internal-location nginx; при заданном значении файл отдаёт nginx через sendfile.
+# Применяется только к запросам, пришедшим через nginx: он передаёт X-Sendfile-Type,
+# а при прямом обращении к бэкенду файл отдаётся как обычно.
+ACCEL_REDIRECT_PREFIX = os.getenv("STATIC_ACCEL_REDIRECT")
+ACCEL_REDIRECT_TYPE = "X-Accel-Redirect"
+
+
+def is_fingerprinted(path: str) -> bool:
+    return FINGERPRINT_RE.match(PurePosixPath(path).stem) is not None
+
+
+def accepts_webp(scope: Scope) -> bool:
+    return "image/webp" in Headers(scope=scope).get("accept", "")
+
+
+class ImageStaticFiles(StaticFiles):
+    """StaticFiles для загруженных изображений.
+
+    Файлы с именем по SHA-256 не меняются, поэтому отдаются с ETag по имени
+    и Cache-Control: immutable. Если клиент принимает WebP и рядом лежит
+    WebP-версия JPEG/PNG, отдаётся она.
+    """
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        negotiable = path.lower().endswith(WEBP_SOURCE_SUFFIXES)
+        if negotiable and scope["method"] in ("GET", "HEAD") and accepts_webp(scope):
+            webp_path = str(PurePosixPath(path).with_suffix(".webp"))
+            full_path, stat_result = await anyio.to_thread.run_sync(self.lookup_path, webp_path)
+            if stat_result is not None and stat.S_ISREG(stat_result.st_mode):
+                response = self.file_response(full_path, stat_result, scope)
+                response.headers["vary"] = "Accept"
+                return response
+
+        response = await super().get_response(path, scope)
+        if negotiable:
+            response.headers["vary"] = "Accept"
+        return response
+
+    def file_response(self, full_path, stat_result: os.stat_result, scope: Scope,
+                      status_code: int = 200) -> Response:
+        name = os.path.basename(full_path)
+        if is_fingerprinted(name):
+            headers = {"etag": f'"{name}"', "cache-control": IMMUTABLE_CACHE_CONTROL}
+        else:
+            headers = {"etag": f'"{stat_result.st_mtime_ns:x}-{stat_result.st_size:x}"',
+                       "cache-control": REVALIDATE_CACHE_CONTROL}
+
+        request_headers = Headers(scope=scope)
+        if self.is_not_modified(Headers(headers), request_headers):
+            return NotModifiedResponse(Headers(headers))
+
+        if (ACCEL_REDIRECT_PREFIX and self.directory is not None
+                and request_headers.get("x-sendfile-type") == ACCEL_REDIRECT_TYPE):
+            relative = os.path.relpath(full_path, self.directory)
+            headers["x-accel-redirect"] = ACCEL_REDIRECT_PREFIX + PurePosixPath(relative).as_posix()
+            return Response(status_code=status_code, headers=headers)
+
+        response = FileResponse(full_path, status_code=status_code, stat_result=stat_result)
+        response.headers.update(headers)
+        return response
@@ -0,0 +1,346 @@
+import asyncio
+import hashlib
+import hmac
+import mimetypes
+import os
+import time
+from abc import ABC, abstractmethod
+from pathlib import Path as SysPath
+from urllib.parse import urlencode
+from sqlalchemy import event, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from src.database import new_session
+from src.models.images import ImageRefModel
+
+STATIC_ROOT = SysPath("static")
+STATIC_URL = "/static"
+LOCAL_UPLOAD_URL = "/uploads"
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "local")
+UPLOAD_URL_TTL = int(os.getenv("UPLOAD_URL_TTL", "600"))
+UPLOAD_SIGNING_KEY = os.getenv("UPLOAD_SIGNING_KEY") or os.getenv("JWT_SECRET_KEY", "")
+PUBLISHED_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+PENDING_REMOVALS_KEY = "pending_file_removals"
+PENDING_PUBLISHES_KEY = "pending_file_publishes"
+REMOVAL_RETRIES = 5
+REMOVAL_RETRY_DELAY = 1.0
+PUBLISH = "publish"
+DELETE = "delete"
+
+
+def staging_path(key: str) -> SysPath:
+    """Локальный путь объекта: здесь файл сохраняется и обрабатывается до публикации."""
+    return STATIC_ROOT / key
+
+
+def key_for_path(path: SysPath | str) -> str:
+    return SysPath(path).relative_to(STATIC_ROOT).as_posix()
+
+
+def local_key(url: str) -> str | None:
+    """Ключ файла, сохранённого в static/ (в том числе до переключения на S3)."""
+    prefix = f"{STATIC_URL}/"
+    return url[len(prefix):] if url.startswith(prefix) else None
+
+
+class StorageBackend(ABC):
+    """Хранилище изображений. Объекты адресуются ключом вида dogs/<имя файла>."""
+
+    is_local = False
+
+    @abstractmethod
+    def url(self, key: str) -> str:
+        """Публичный URL объекта."""
+
+    @abstractmethod
+    def key_for(self, url: str) -> str | None:
+        """Ключ объекта по URL или None, если URL указывает не в это хранилище."""
+
+    @abstractmethod
+    async def exists(self, key: str) -> bool:
+        ...
+
+    @abstractmethod
+    async def delete(self, key: str):
+        ...
+
+    @abstractmethod
+    async def publish(self, keys):
+        """Переносит подготовленные локально файлы в хранилище."""
+
+    async def discard_staged(self, keys):
+        """Удаляет локальные копии, которые не нужно публиковать."""
+        return None
+
+    @abstractmethod
+    def presign_upload(self, key: str, content_type: str, max_size: int,
+                       expires_in: int) -> dict:
+        """Параметры запроса, которым браузер загружает файл напрямую."""
+
+
+class LocalStorage(StorageBackend):
+    """Файлы в каталоге static/, загрузка по подписанной ссылке на PUT /uploads/{key}."""
+
+    is_local = True
+
+    def __init__(self, base_url: str = STATIC_URL, upload_url: str = LOCAL_UPLOAD_URL,
+                 signing_key: str = UPLOAD_SIGNING_KEY):
+        self.base_url = base_url
+        self.upload_url = upload_url
+        self.signing_key = signing_key.encode()
+
+    def url(self, key: str) -> str:
+        return f"{self.base_url}/{key}"
+
+    def key_for(self, url: str) -> str | None:
+        prefix = f"{self.base_url}/"
+        return url[len(prefix):] if url.startswith(prefix) else None
+
+    async def exists(self, key: str) -> bool:
+        return await asyncio.to_thread(staging_path(key).is_file)
+
+    async def delete(self, key: str):
+        await asyncio.to_thread(staging_path(key).unlink, missing_ok=True)
+
+    async def publish(self, keys):
+        return None
+
+    def _sign(self, key: str, expires: int) -> str:
+        message = f"{key}:{expires}".encode()
+        return hmac.new(self.signing_key, message, hashlib.sha256).hexdigest()
+
+    def presign_upload(self, key: str, content_type: str, max_size: int,
+                       expires_in: int) -> dict:
+        expires = int(time.time()) + expires_in
+        query = urlencode({"expires": expires, "signature": self._sign(key, expires)})
+        return {
+            "url": f"{self.upload_url}/{key}?{query}",
+            "method": "PUT",
+            "fields": {},
+            "headers": {"Content-Type": content_type},
+        }
+
+    def verify_upload(self, key: str, expires: int, signature: str) -> bool:
+        if expires < time.time():
+            return False
+        return hmac.compare_digest(self._sign(key, expires), signature)
+
+
+class S3Storage(StorageBackend):
+    """S3-совместимое хранилище (AWS S3, MinIO). Требует пакет boto3."""
+
+    def __init__(self, bucket: str, endpoint_url: str | None = None,
+                 public_url: str | None = None, region: str | None = None):
+        try:
+            import boto3  # pylint: disable=import-outside-toplevel
+        except ImportError as exc:
+            raise RuntimeError("Для STORAGE_BACKEND=s3 требуется пакет boto3") from exc
+        self.bucket = bucket
+        self.client = boto3.client("s3", endpoint_url=endpoint_url, region_name=region)
+        if public_url is None:
+            public_url = (f"{endpoint_url.rstrip('/')}/{bucket}" if endpoint_url
+                          else f"https://{bucket}.s3.amazonaws.com")
+        self.public_url = public_url.rstrip("/")
+
+    def url(self, key: str) -> str:
+        return f"{self.public_url}/{key}"
+
+    def key_for(self, url: str) -> str | None:
+        prefix = f"{self.public_url}/"
+        return url[len(prefix):] if url.startswith(prefix) else None
+
+    async def exists(self, key: str) -> bool:
+        try:
+            await asyncio.to_thread(self.client.head_object, Bucket=self.bucket, Key=key)
+        except self.client.exceptions.ClientError:
+            return False
+        return True
+
+    async def delete(self, key: str):
+        await asyncio.to_thread(self.client.delete_object, Bucket=self.bucket, Key=key)
+
+    def _upload_staged(self, key: str):
+        path = staging_path(key)
+        if not path.is_file():
+            return
+        content_type = mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+        self.client.upload_file(str(path), self.bucket, key, ExtraArgs={
+            "ContentType": content_type,
+            "CacheControl": PUBLISHED_CACHE_CONTROL,
+        })
+        path.unlink(missing_ok=True)
+
+    async def publish(self, keys):
+        await asyncio.gather(*(asyncio.to_thread(self._upload_staged, key) for key in keys))
+
+    async def discard_staged(self, keys):
+        await asyncio.gather(*(asyncio.to_thread(staging_path(key).unlink, missing_ok=True)
+                               for key in keys))
+
+    def presign_upload(self, key: str, content_type: str, max_size: int,
+                       expires_in: int) -> dict:
+        post = self.client.generate_presigned_post(
+            Bucket=self.bucket,
+            Key=key,
+            Fields={"Content-Type": content_type},
+            Conditions=[
+                {"Content-Type": content_type},
+                ["content-length-range", 1, max_size],
+            ],
+            ExpiresIn=expires_in,
+        )
+        return {"url": post["url"], "method": "POST", "fields": post["fields"], "headers": {}}
+
+
+def create_storage() -> StorageBackend:
+    if STORAGE_BACKEND == "s3":
+        return S3Storage(
+            bucket=os.environ["S3_BUCKET"],
+            endpoint_url=os.getenv("S3_ENDPOINT_URL") or None,
+            public_url=os.getenv("S3_PUBLIC_URL") or None,
+            region=os.getenv("S3_REGION") or None,
+        )
+    return LocalStorage()
+
+
+storage = create_storage()
+
+
+class FileJanitor:
+    """Фоновая публикация и удаление объектов хранилища с повторными попытками.
+
+    Обработчики не ждут хранилища: ключи ставятся в очередь после
+    успешного commit, а воркер выполняет storage.publish или storage.delete.
+    """
+
+    def __init__(self, retries: int = REMOVAL_RETRIES, retry_delay: float = REMOVAL_RETRY_DELAY):
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self._queue: asyncio.Queue[tuple[str, object, int]] | None = None
+        self._worker: asyncio.Task | None = None
+
+    @property
+    def queue(self) -> asyncio.Queue:
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+        return self._queue
+
+    def start(self):
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.create_task(self._run(), name="file_janitor")
+
+    async def stop(self):
+        if self._worker is None:
+            return
+        await self.queue.join()
+        self._worker.cancel()
+        await asyncio.gather(self._worker, return_exceptions=True)
+        self._worker = None
+
+    def schedule(self, removals: dict[str | None, set[str]]):
+        for image_url, keys in removals.items():
+            self.queue.put_nowait((DELETE, (image_url, tuple(keys)), 0))
+
+    def schedule_publish(self, keys):
+        for key in keys:
+            self.queue.put_nowait((PUBLISH, key, 0))
+
+    async def _remove_unreferenced(self, image_url: str | None, keys: tuple[str, ...]):
+        """Удаляет файлы, если на изображение так и не появилось новых ссылок.
+
+        Между commit и удалением та же фотография может быть загружена снова:
+        проверка и удаление выполняются под блокировкой, которую берут
+        acquire_image и release_image.
+        """
+        if image_url is None:
+            await asyncio.gather(*(storage.delete(key) for key in keys))
+            return
+        async with new_session() as session:
+            await lock_image(session, image_url)
+            referenced = (await session.execute(
+                select(ImageRefModel.url).where(ImageRefModel.url == image_url)
+            )).scalar_one_or_none()
+            if referenced is None:
+                await asyncio.gather(*(storage.delete(key) for key in keys))
+            await session.commit()
+
+    async def _perform(self, action: str, payload):
+        if action == PUBLISH:
+            await storage.publish([payload])
+        else:
+            await self._remove_unreferenced(*payload)
+
+    async def _run(self):
+        while True:
+            action, payload, attempt = await self.queue.get()
+            try:
+                await self._perform(action, payload)
+            except Exception as e:
+                if attempt + 1 < self.retries:
+                    asyncio.get_running_loop().call_later(
+                        self.retry_delay * 2 ** attempt, self.queue.put_nowait,
+                        (action, payload, attempt + 1)
+                    )
+                else:
+                    print(f"Ошибка при обработке файла {payload} ({action}): {e}")
+            finally:
+                self.queue.task_done()
+
+
+file_janitor = FileJanitor()
+
+
+async def lock_image(session: AsyncSession, image_url: str):
+    """Блокировка учёта ссылок на изображение до конца транзакции."""
+    await session.execute(text("SELECT pg_advisory_xact_lock(hashtext(:url))"),
+                          {"url": image_url})
+
+
+async def lock_images(session: AsyncSession, image_urls):
+    """Берёт блокировки нескольких изображений одним запросом.
+
+    URL упорядочиваются, чтобы параллельные транзакции не ждали друг друга по кругу.
+    """
+    await session.execute(
+        text("SELECT pg_advisory_xact_lock(hashtext(url)) "
+             "FROM unnest(CAST(:urls AS text[])) AS url"),
+        {"urls": sorted(set(image_urls))},
+    )
+
+
+def remove_after_commit(session: AsyncSession, keys, image_url: str | None = None):
+    """Откладывает удаление объектов хранилища до успешного commit сессии.
+
+    При откате список сбрасывается, и файлы остаются на месте. Файлы,
+    загруженные в откаченной транзакции, подбирает src.utils.image_gc.
+    Если передан image_url, перед удалением проверяется, что на изображение
+    снова не сослались.
+    """
+    removals = session.info.setdefault(PENDING_REMOVALS_KEY, {})
+    removals.setdefault(image_url, set()).update(keys)
+
+
+def publish_after_commit(session: AsyncSession, keys):
+    """Откладывает публикацию подготовленных файлов до успешного commit сессии.
+
+    При откате в хранилище ничего не попадает, а локальные копии подбирает
+    src.utils.image_gc.
+    """
+    session.info.setdefault(PENDING_PUBLISHES_KEY, set()).update(keys)
+
+
+@event.listens_for(Session, "after_commit")
+def _schedule_removals(session: Session):
+    keys = session.info.pop(PENDING_PUBLISHES_KEY, None)
+    if keys:
+        file_janitor.schedule_publish(keys)
+    removals = session.info.pop(PENDING_REMOVALS_KEY, None)
+    if removals:
+        file_janitor.schedule(removals)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_removals(session: Session, previous_transaction):
+    session.info.pop(PENDING_PUBLISHES_KEY, None)
+    session.info.pop(PENDING_REMOVALS_KEY, None)
@@ -0,0 +1,81 @@
+from fastapi import HTTPException
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import make_transient_to_detached
+from src.database import new_session
+from src.models.tags import TagModel
+from src.schemas.tags import TagResponseSchema
+from src.utils.etag import TAGS
+from src.utils.invalidation import on_change
+
+
+class TagRegistry:
+    """Каталог тегов в памяти процесса.
+
+    Загружается при старте приложения и обновляется обработчиками
+    src/api/tags.py, поэтому проверка tag_ids в обработчиках собак и
+    новостей и выдача списка тегов обходятся без запросов к БД.
+    """
+
+    def __init__(self):
+        self._tags: dict[int, TagResponseSchema] = {}
+        self._loaded = False
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._loaded
+
+    async def load(self):
+        async with new_session() as session:
+            result = await session.execute(select(TagModel.id, TagModel.name).order_by(TagModel.id))
+            rows = result.all()
+        self._tags = {tag_id: TagResponseSchema(id=tag_id, name=name) for tag_id, name in rows}
+        self._loaded = True
+
+    def all(self) -> list[TagResponseSchema]:
+        return list(self._tags.values())
+
+    def get(self, tag_id: int) -> TagResponseSchema | None:
+        return self._tags.get(tag_id)
+
+    def upsert(self, tag_id: int, name: str):
+        self._tags[tag_id] = TagResponseSchema(id=tag_id, name=name)
+
+    def discard(self, tag_id: int):
+        self._tags.pop(tag_id, None)
+
+    def missing(self, tag_ids) -> set[int]:
+        return set(tag_ids) - self._tags.keys()
+
+    async def attach(self, session: AsyncSession, tag_ids) -> list[TagModel]:
+        """Возвращает теги, привязанные к сессии без SELECT.
+
+        Объект собирается из каталога и объявляется уже сохранённым, а
+        merge(load=False) подставляет его в identity map или возвращает
+        экземпляр, который сессия уже загрузила.
+        """
+        tags = []
+        for tag_id in dict.fromkeys(tag_ids):
+            tag = TagModel(id=tag_id, name=self._tags[tag_id].name)
+            make_transient_to_detached(tag)
+            tags.append(await session.merge(tag, load=False))
+        return tags
+
+    async def flush(self, session: AsyncSession):
+        """Сохраняет изменения сессии вместе со связями с тегами.
+
+        Тег мог быть удалён в другом воркере раньше, чем сюда дошло
+        уведомление: нарушение внешнего ключа возвращается как 400, а
+        каталог перечитывается.
+        """
+        try:
+            await session.flush()
+        except IntegrityError as exc:
+            await session.rollback()
+            await self.load()
+            raise HTTPException(400, "Один или несколько тегов не найдены") from exc
+
+
+tag_registry = TagRegistry()
+on_change(TAGS, tag_registry.load)
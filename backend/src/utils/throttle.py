@@ -0,0 +1,160 @@
+import asyncio
+import os
+import time
+import uuid
+from abc import ABC, abstractmethod
+from collections import Counter, deque
+from src.utils.cache import REDIS_URL
+
+LOGIN_THROTTLE_BACKEND = os.getenv("LOGIN_THROTTLE_BACKEND", "memory")
+LOGIN_THROTTLE_WINDOW = int(os.getenv("LOGIN_THROTTLE_WINDOW", "300"))
+LOGIN_MAX_ATTEMPTS_PER_USERNAME = int(os.getenv("LOGIN_MAX_ATTEMPTS_PER_USERNAME", "5"))
+LOGIN_MAX_ATTEMPTS_PER_IP = int(os.getenv("LOGIN_MAX_ATTEMPTS_PER_IP", "20"))
+SWEEP_EVERY = 1024
+# Начальная оценка времени проверки Argon2 до первых реальных измерений
+DEFAULT_VERIFY_SECONDS = 0.1
+VERIFY_EMA_WEIGHT = 0.1
+
+# Атомарно удаляет устаревшие попытки, проверяет лимит и учитывает новую попытку.
+# Возвращает -1 или число миллисекунд до освобождения места в окне.
+SLIDING_WINDOW_SCRIPT = """
+redis.call('ZREMRANGEBYSCORE', KEYS[1], 0, ARGV[1] - ARGV[2])
+if redis.call('ZCARD', KEYS[1]) >= tonumber(ARGV[3]) then
+    local oldest = redis.call('ZRANGE', KEYS[1], 0, 0, 'WITHSCORES')
+    return tonumber(oldest[2]) + ARGV[2] - ARGV[1]
+end
+redis.call('ZADD', KEYS[1], ARGV[1], ARGV[4])
+redis.call('PEXPIRE', KEYS[1], ARGV[2])
+return -1
+"""
+
+# То же без учёта новой попытки: только проверка, исчерпан ли лимит
+SLIDING_WINDOW_PEEK_SCRIPT = """
+redis.call('ZREMRANGEBYSCORE', KEYS[1], 0, ARGV[1] - ARGV[2])
+if redis.call('ZCARD', KEYS[1]) >= tonumber(ARGV[3]) then
+    local oldest = redis.call('ZRANGE', KEYS[1], 0, 0, 'WITHSCORES')
+    return tonumber(oldest[2]) + ARGV[2] - ARGV[1]
+end
+return -1
+"""
+
+
+class RateLimiter(ABC):
+    """Ограничитель со скользящим окном: не больше limit попыток за window секунд."""
+
+    @abstractmethod
+    async def hit(self, key: str, limit: int, window: float) -> float | None:
+        """Учитывает попытку. Если лимит исчерпан, попытка не учитывается и
+        возвращается число секунд до освобождения места в окне."""
+
+    @abstractmethod
+    async def peek(self, key: str, limit: int, window: float) -> float | None:
+        """Как hit, но попытку не учитывает."""
+
+    @abstractmethod
+    async def reset(self, key: str):
+        ...
+
+
+class MemoryRateLimiter(RateLimiter):
+    """Окна в памяти процесса; при нескольких воркерах лимит действует в каждом отдельно."""
+
+    def __init__(self):
+        self._attempts: dict[str, deque[float]] = {}
+        self._calls = 0
+
+    async def hit(self, key: str, limit: int, window: float) -> float | None:
+        now = time.monotonic()
+        self._calls += 1
+        if self._calls % SWEEP_EVERY == 0:
+            self._sweep(now, window)
+        attempts = self._attempts.setdefault(key, deque())
+        retry_after = self._check(attempts, now, limit, window)
+        if retry_after is None:
+            attempts.append(now)
+        return retry_after
+
+    async def peek(self, key: str, limit: int, window: float) -> float | None:
+        attempts = self._attempts.get(key)
+        if attempts is None:
+            return None
+        return self._check(attempts, time.monotonic(), limit, window)
+
+    @staticmethod
+    def _check(attempts: deque[float], now: float, limit: int, window: float) -> float | None:
+        while attempts and attempts[0] <= now - window:
+            attempts.popleft()
+        if len(attempts) >= limit:
+            return attempts[0] + window - now
+        return None
+
+    async def reset(self, key: str):
+        self._attempts.pop(key, None)
+
+    def _sweep(self, now: float, window: float):
+        stale = [key for key, attempts in self._attempts.items()
+                 if not attempts or attempts[-1] <= now - window]
+        for key in stale:
+            del self._attempts[key]
+
+
+class RedisRateLimiter(RateLimiter):
+    """Общие для всех воркеров окна в Redis (sorted set на ключ). Требует пакет redis."""
+
+    def __init__(self, url: str = REDIS_URL, prefix: str = "throttle:"):
+        try:
+            from redis import asyncio as redis_asyncio  # pylint: disable=import-outside-toplevel
+        except ImportError as exc:
+            raise RuntimeError("Для LOGIN_THROTTLE_BACKEND=redis требуется пакет redis") from exc
+        self.client = redis_asyncio.from_url(url)
+        self.prefix = prefix
+        self._script = self.client.register_script(SLIDING_WINDOW_SCRIPT)
+        self._peek_script = self.client.register_script(SLIDING_WINDOW_PEEK_SCRIPT)
+
+    async def hit(self, key: str, limit: int, window: float) -> float | None:
+        now_ms = int(time.time() * 1000)
+        retry_after_ms = await self._script(
+            keys=[self.prefix + key],
+            args=[now_ms, int(window * 1000), limit, f"{now_ms}-{uuid.uuid4().hex}"],
+        )
+        return None if retry_after_ms < 0 else retry_after_ms / 1000
+
+    async def peek(self, key: str, limit: int, window: float) -> float | None:
+        now_ms = int(time.time() * 1000)
+        retry_after_ms = await self._peek_script(
+            keys=[self.prefix + key], args=[now_ms, int(window * 1000), limit],
+        )
+        return None if retry_after_ms < 0 else retry_after_ms / 1000
+
+    async def reset(self, key: str):
+        await self.client.delete(self.prefix + key)
+
+
+class VerifyTimer:
+    """Скользящее среднее времени проверки пароля.
+
+    Для неизвестного имени пользователя ответ задерживается на это время
+    через asyncio.sleep: по времени ответа имя не отличить от существующего,
+    а процессор не тратится на Argon2.
+    """
+
+    def __init__(self, initial: float = DEFAULT_VERIFY_SECONDS, weight: float = VERIFY_EMA_WEIGHT):
+        self.average = initial
+        self.weight = weight
+
+    def observe(self, seconds: float):
+        self.average += self.weight * (seconds - self.average)
+
+    async def imitate(self):
+        await asyncio.sleep(self.average)
+
+
+def create_rate_limiter() -> RateLimiter:
+    if LOGIN_THROTTLE_BACKEND == "redis":
+        return RedisRateLimiter()
+    return MemoryRateLimiter()
+
+
+login_limiter = create_rate_limiter()
+verify_timer = VerifyTimer()
+login_metrics = Counter()
@@ -1,43 +1,170 @@
+import asyncio
+import hashlib
+import os
+import re
+import tempfile
 import uuid
+from dataclasses import dataclass
 from pathlib import Path as SysPath
+from typing import AsyncIterator, BinaryIO
 from fastapi import HTTPException, UploadFile
+from src.enums import UploadKindEnum
+from src.utils.storage import STATIC_ROOT, storage, staging_path, key_for_path
 
-UPLOAD_DIR = SysPath("static/dogs")
+UPLOAD_DIR = STATIC_ROOT / UploadKindEnum.DOGS.value
 UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
 
-async def validate_and_save_dog_image(file: UploadFile) -> str:
-    image_url = None
-    if file:
-        if file.content_type not in ("image/jpeg", "image/png", "image/jpg"):
-            raise HTTPException(400, "Разрешены только JPEG и PNG изображения")
+NEWS_UPLOAD_DIR = STATIC_ROOT / UploadKindEnum.NEWS.value
+NEWS_UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
 
-        ext = file.filename.split(".")[-1].lower() if "." in file.filename else "jpg"
-        filename = f"{uuid.uuid4()}.{ext}"
-        file_path = UPLOAD_DIR / filename
+MAX_UPLOAD_SIZE = int(os.getenv("MAX_UPLOAD_SIZE", str(10 * 1024 * 1024)))
+CHUNK_SIZE = 1024 * 1024
+SIGNATURE_SIZE = 12
 
-        with open(file_path, "wb") as f:
-            f.write(await file.read())
+IMAGE_EXTENSIONS = {"image/jpeg": "jpg", "image/png": "png", "image/webp": "webp"}
+UPLOAD_KEY_RE = re.compile(r"^(dogs|news)/[0-9a-f]{32}\.(jpg|png|webp)$")
 
-        image_url = f"/static/dogs/{filename}"
-    return image_url
 
-NEWS_UPLOAD_DIR = SysPath("static/news")
-NEWS_UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
+@dataclass
+class StoredImage:
+    url: str
+    path: SysPath
+    sha256: str
+    size: int
 
-async def validate_and_save_news_image(file: UploadFile) -> str | None:
-    """Валидирует и сохраняет изображение для новости. Возвращает URL или None."""
-    if not file:
-        return None
 
-    if file.content_type not in ("image/jpeg", "image/png", "image/jpg"):
-        raise HTTPException(400, "Разрешены только JPEG и PNG изображения")
+def sniff_image_type(header: bytes) -> str | None:
+    """Определяет формат изображения по сигнатуре, а не по заявленному content_type."""
+    if header.startswith(b"\xff\xd8\xff"):
+        return "jpg"
+    if header.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "png"
+    if header[:4] == b"RIFF" and header[8:12] == b"WEBP":
+        return "webp"
+    return None
+
+
+def _unsupported_type() -> HTTPException:
+    return HTTPException(400, "Разрешены только JPEG, PNG и WebP изображения")
+
+
+def _too_large() -> HTTPException:
+    return HTTPException(413, f"Размер изображения превышает {MAX_UPLOAD_SIZE // (1024 * 1024)} МБ")
+
+
+def _copy_to_storage(source: BinaryIO, upload_dir: SysPath) -> tuple[SysPath, str, int]:
+    """Копирует файл порциями во временный файл рядом с целевым и атомарно
+    переименовывает его в <sha256>.<ext>. Если такое содержимое уже хранится,
+    временный файл удаляется, а у хранящегося обновляется время изменения.
+    Выполняется в рабочем потоке."""
+    source.seek(0)
+    digest = hashlib.sha256()
+    size = 0
+    fd, tmp_name = tempfile.mkstemp(dir=upload_dir, suffix=".part")
+    tmp_path = SysPath(tmp_name)
+    try:
+        with os.fdopen(fd, "wb") as target:
+            chunk = source.read(CHUNK_SIZE)
+            ext = sniff_image_type(chunk)
+            if ext is None:
+                raise _unsupported_type()
+            while chunk:
+                size += len(chunk)
+                if size > MAX_UPLOAD_SIZE:
+                    raise _too_large()
+                digest.update(chunk)
+                target.write(chunk)
+                chunk = source.read(CHUNK_SIZE)
+        file_path = upload_dir / f"{digest.hexdigest()}.{ext}"
+        try:
+            # Обновлённое время изменения защищает уже хранящийся файл от очистки
+            # image_gc, пока ссылка на него ещё не зафиксирована
+            os.utime(file_path)
+            tmp_path.unlink()
+        except FileNotFoundError:
+            os.replace(tmp_path, file_path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+    return file_path, digest.hexdigest(), size
+
 
-    ext = file.filename.split(".")[-1].lower() if "." in file.filename else "jpg"
-    filename = f"{uuid.uuid4()}.{ext}"
-    file_path = NEWS_UPLOAD_DIR / filename
+async def store_image(file: UploadFile, upload_dir: SysPath) -> StoredImage:
+    if file.size is not None and file.size > MAX_UPLOAD_SIZE:
+        raise _too_large()
+    file_path, sha256, size = await asyncio.to_thread(_copy_to_storage, file.file, upload_dir)
+    return StoredImage(url=storage.url(key_for_path(file_path)), path=file_path, sha256=sha256,
+                       size=size)
 
-    with open(file_path, "wb") as f:
-        f.write(await file.read())
 
-    image_url = f"/static/news/{filename}"
+def new_upload_key(kind: UploadKindEnum, content_type: str) -> str:
+    """Ключ для прямой загрузки браузером; формат файла задаётся заявленным типом."""
+    ext = IMAGE_EXTENSIONS.get(content_type)
+    if ext is None:
+        raise _unsupported_type()
+    return f"{kind.value}/{uuid.uuid4().hex}.{ext}"
+
+
+async def receive_upload(key: str, chunks: AsyncIterator[bytes]) -> StoredImage:
+    """Принимает тело подписанного PUT-запроса локального хранилища.
+
+    Проверяет сигнатуру формата и размер так же, как загрузка через форму,
+    и атомарно переименовывает временный файл в ключ загрузки.
+    """
+    path = staging_path(key)
+    fd, tmp_name = await asyncio.to_thread(tempfile.mkstemp, dir=path.parent, suffix=".part")
+    tmp_path = SysPath(tmp_name)
+    digest = hashlib.sha256()
+    size = 0
+    header = b""
+    try:
+        with os.fdopen(fd, "wb") as target:
+            async for chunk in chunks:
+                size += len(chunk)
+                if size > MAX_UPLOAD_SIZE:
+                    raise _too_large()
+                if len(header) < SIGNATURE_SIZE:
+                    header += chunk[:SIGNATURE_SIZE]
+                digest.update(chunk)
+                await asyncio.to_thread(target.write, chunk)
+        if sniff_image_type(header) != path.suffix.lstrip("."):
+            raise _unsupported_type()
+        await asyncio.to_thread(os.replace, tmp_path, path)
+    except BaseException:
+        await asyncio.to_thread(tmp_path.unlink, missing_ok=True)
+        raise
+    return StoredImage(url=storage.url(key), path=path, sha256=digest.hexdigest(), size=size)
+
+
+async def claim_uploaded_image(image_key: str, kind: UploadKindEnum) -> str:
+    """Проверяет ключ загруженного напрямую файла и возвращает его URL."""
+    match = UPLOAD_KEY_RE.match(image_key)
+    if match is None or match.group(1) != kind.value:
+        raise HTTPException(400, "Неверный ключ загруженного файла")
+    if not await storage.exists(image_key):
+        raise HTTPException(400, "Файл по ключу не найден, загрузите его заново")
+    return storage.url(image_key)
+
+
+async def validate_and_save_dog_image(file: UploadFile, image_key: str | None = None) -> str:
+    image_url = None
+    if image_key:
+        image_url = await claim_uploaded_image(image_key, UploadKindEnum.DOGS)
+    elif file:
+        stored = await store_image(file, UPLOAD_DIR)
+        image_url = stored.url
     return image_url
+
+
+async def validate_and_save_news_image(file: UploadFile,
+                                       image_key: str | None = None) -> str | None:
+    """Валидирует и сохраняет изображение для новости. Возвращает URL или None.
+
+    Вместо файла можно передать ключ объекта, загруженного по ссылке из /uploads/presign.
+    """
+    if image_key:
+        return await claim_uploaded_image(image_key, UploadKindEnum.NEWS)
+    if not file:
+        return None
+    stored = await store_image(file, NEWS_UPLOAD_DIR)
+    return stored.url
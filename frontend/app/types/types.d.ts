@@ -28,6 +28,11 @@ declare global {
         image_url: string | null
     }
 
+    interface DogPage {
+        items: Dog[]
+        next_cursor: string | null
+    }
+
     interface DogSlideInfo {
         id: number
         image_url: string